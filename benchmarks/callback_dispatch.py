@@ -0,0 +1,101 @@
+"""Measure the cost of matching one callback query to its handler.
+
+Compares the previous dispatch (Pyrogram trying one regex filter per handler, in
+registration order) with the CallbackRouter dict lookup, for the bot's real routes and
+with extra routes added to show how each scales as features are added.
+
+Usage: python benchmarks/callback_dispatch.py [--iterations N]
+"""
+import argparse
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.router import CallbackRouter, callback_data  # noqa: E402
+
+# (action, params, legacy regex) for every callback the bot handles, in plugin load order
+ROUTES = [
+    ("check_subscription", (), r"^check_subscription$"),
+    ("retry_start", (), r"^retry_start$"),
+    ("my_submissions", (), r"^my_submissions$"),
+    ("group_full", ("group_id",), r"^group_full_(?P<group_id>.+)$"),
+    ("vcf_ready", ("group_id",), r"^vcf_ready_(?P<group_id>.+)$"),
+    ("about_bot", (), r"^about_bot$"),
+    ("tutorial", (), r"^tutorial$"),
+    ("submit_numbers", (), r"^submit_numbers$"),
+    ("select_group", ("limit",), r"^select_group_(?P<limit>\d+)$"),
+    ("submit_my_number", ("group_id",), r"^submit_my_number_(?P<group_id>.+)$"),
+    ("confirm_submission", ("group_id", "number", "name"), r"^confirm_submission_(?P<group_id>.+?)__(?P<name>.+?)__(?P<number>.+)$"),
+    ("back_to_home", (), r"^back_to_home$"),
+    ("gpstats", ("action", "page"), r"^gpstats_(?P<action>next|back)_(?P<page>\d+)$"),
+]
+
+# A typical mix of taps: navigation dominates, confirmations are the long tail
+TAPS = [
+    ("back_to_home",),
+    ("submit_numbers",),
+    ("select_group", 100),
+    ("submit_my_number", "ID-XP100GROUP-3"),
+    ("confirm_submission", "ID-XP100GROUP-3", "+256787123456", "John Doe"),
+    ("my_submissions",),
+    ("back_to_home",),
+]
+
+async def _noop(*args):
+    pass
+
+def build(extra_routes: int):
+    # Extra routes go first, as handlers from a plugin module that sorts earlier would
+    routes = [(f"feature_{i}", ("arg",), rf"^feature_{i}_(?P<arg>.+)$") for i in range(extra_routes)] + ROUTES
+    router = CallbackRouter()
+    regexes = []
+    for action, params, legacy in routes:
+        router.route(action, params, legacy)(_noop)
+        regexes.append(re.compile(legacy))
+    return router, regexes
+
+def legacy_data(tap) -> str:
+    action, *args = tap
+    if action == "confirm_submission":
+        group_id, number, name = args
+        return f"confirm_submission_{group_id}__{name}__{number}"
+    return "_".join([action, *(str(arg) for arg in args)])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20000)
+    options = parser.parse_args()
+
+    new_taps = [callback_data(*tap) for tap in TAPS]
+    old_taps = [legacy_data(tap) for tap in TAPS]
+
+    print(f"{'routes':>7} {'regex scan':>12} {'router':>12} {'router legacy':>14}   (ns per tap)")
+    for extra in (0, 25, 100, 400):
+        router, regexes = build(extra)
+
+        def regex_scan():
+            # Pyrogram checks each handler's filter in turn until one matches
+            for data in old_taps:
+                for regex in regexes:
+                    if regex.match(data):
+                        break
+
+        def routed():
+            for data in new_taps:
+                router.resolve(data)
+
+        def routed_legacy():
+            for data in old_taps:
+                router.resolve(data)
+
+        results = []
+        for func in (regex_scan, routed, routed_legacy):
+            seconds = min(timeit.repeat(func, number=options.iterations, repeat=3))
+            results.append(seconds / (options.iterations * len(TAPS)) * 1e9)
+        print(f"{len(regexes):>7} {results[0]:>12.0f} {results[1]:>12.0f} {results[2]:>14.0f}")
+
+if __name__ == "__main__":
+    main()
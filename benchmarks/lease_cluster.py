@@ -0,0 +1,286 @@
+"""Run several worker processes against one Mongo and check that leases give single ownership.
+
+Every process runs the real coordination code: run_as_leader for a singleton task, the
+approval job queue (claim, checkpoint, release), and LeaseLock-guarded sections on a few
+shared group locks, the way /approve, /approveall and the job workers contend for them.
+Each process records when it held what; afterwards the harness checks that
+
+  - at most one leader ran at any moment, and there was a leader,
+  - every job ran to completion exactly once, never held by two processes at a time,
+  - no group lock was held by two processes at a time.
+
+With --kill-leader the current leader is killed halfway to check failover, and with
+--lock-error-rate a share of lease acquisitions and renewals fail as if Mongo were briefly
+unreachable, which must not cost a leader its term or a lock holder its lease. Point it at a
+local mongod with --mongo-uri (the database is dropped first), or pass --standin to share
+one in-memory mongomock database between the processes (pip install mongomock).
+
+Usage: python benchmarks/lease_cluster.py [--processes N] [--duration S] [--kill-leader]
+                                          [--lock-error-rate P] [--mongo-uri URI | --standin]
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import signal
+import sys
+import threading
+import time
+from collections import defaultdict
+from multiprocessing.managers import BaseManager
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+LEADER_TASK = "lease-cluster"
+
+def configure_environment(options, worker_id: str = "harness"):
+    # Must run before config is imported; short leases keep failover within the run
+    os.environ["MONGO_DB_URI"] = options.mongo_uri
+    os.environ["MONGO_DB_NAME"] = options.db_name
+    os.environ["WORKER_ID"] = worker_id
+    os.environ["LOCK_LEASE_SECONDS"] = str(options.lease)
+    os.environ["LEADER_LEASE_SECONDS"] = str(options.lease)
+    os.environ.setdefault("API_ID", "0")
+
+class StandinDatabase:
+    """A mongomock database served to every process, one operation at a time."""
+
+    def __init__(self):
+        import mongomock
+        self._db = mongomock.MongoClient().db
+        self._lock = threading.Lock()
+
+    def call(self, collection: str, method: str, args, kwargs):
+        with self._lock:
+            result = getattr(self._db[collection], method)(*args, **kwargs)
+            # Cursors cannot leave the server process
+            return list(result) if hasattr(result, "__next__") else result
+
+_standin = None
+
+def _get_standin() -> StandinDatabase:
+    # Runs in the manager's server process, so every process shares this one instance
+    global _standin
+    if _standin is None:
+        _standin = StandinDatabase()
+    return _standin
+
+class StandinManager(BaseManager):
+    pass
+
+StandinManager.register("database", callable=_get_standin)
+
+class RemoteCollection:
+    def __init__(self, server, name: str):
+        self._server = server
+        self.name = name
+
+    def __getattr__(self, method: str):
+        return lambda *args, **kwargs: self._server.call(self.name, method, args, kwargs)
+
+class RemoteDatabase:
+    """Enough of pymongo's Database for the lock and job modules, backed by the stand-in."""
+
+    def __init__(self, server):
+        self._server = server
+
+    def __getattr__(self, name: str):
+        return RemoteCollection(self._server, name)
+
+    def __getitem__(self, name: str):
+        return RemoteCollection(self._server, name)
+
+def connect(options):
+    import database.connection
+    if options.standin:
+        manager = StandinManager(address=options.standin_address, authkey=b"lease-cluster")
+        manager.connect()
+        database.connection.db = RemoteDatabase(manager.database())
+    return database.connection.get_db()
+
+def worker_main(index: int, options):
+    worker_id = f"worker-{index}"
+    configure_environment(options, worker_id)
+    db = connect(options)
+
+    from database.jobs import claim_next_approval_job, checkpoint_approval_job, release_approval_job
+    import utils.locks
+    from utils.locks import LeaseLock, LockBusy, run_as_leader
+
+    if options.lock_error_rate:
+        acquire_lock = utils.locks.acquire_lock
+
+        def flaky_acquire_lock(*args):
+            # None is what acquire_lock returns when Mongo could not be asked
+            return None if random.random() < options.lock_error_rate else acquire_lock(*args)
+        utils.locks.acquire_lock = flaky_acquire_lock
+
+    # One LeaseLock per group and process, like utils.approval.get_group_lock: leases are
+    # owned by the process, so its coroutines must queue on the shared local lock
+    group_locks = {}
+
+    def group_lock(group_id: str) -> LeaseLock:
+        if group_id not in group_locks:
+            group_locks[group_id] = LeaseLock(f"group:{group_id}", options.lease)
+        return group_locks[group_id]
+
+    def record(kind: str, key: str, start: float, end: float):
+        db.intervals.insert_one({"kind": kind, "key": key, "worker": worker_id, "start": start, "end": end})
+
+    async def leader_task():
+        # Track the running interval, so a killed leader still leaves its last tick behind
+        start = time.time()
+        interval_id = db.intervals.insert_one(
+            {"kind": "leader", "key": LEADER_TASK, "worker": worker_id, "start": start, "end": start}
+        ).inserted_id
+        try:
+            while True:
+                await asyncio.sleep(0.1)
+                await asyncio.to_thread(db.intervals.update_one, {"_id": interval_id}, {"$set": {"end": time.time()}})
+        finally:
+            db.intervals.update_one({"_id": interval_id}, {"$set": {"end": time.time()}})
+
+    async def job_worker():
+        while True:
+            job = await asyncio.to_thread(claim_next_approval_job, worker_id, options.lease)
+            if not job:
+                await asyncio.sleep(0.05)
+                continue
+            try:
+                async with group_lock(job["group_id"]):
+                    start = time.time()
+                    for stage in ("rotated", "uploaded", "notified", "retired"):
+                        await asyncio.sleep(random.uniform(0.005, 0.03))
+                        if not await asyncio.to_thread(checkpoint_approval_job, job["_id"], worker_id, options.lease, stage=stage):
+                            raise RuntimeError(f"lost job {job['_id']}")
+                    record("job", job["_id"], start, time.time())
+                    record("group", job["group_id"], start, time.time())
+                await asyncio.to_thread(release_approval_job, job["_id"], worker_id, "done")
+            except LockBusy:
+                await asyncio.to_thread(release_approval_job, job["_id"], worker_id, "pending", None, 0.05)
+            except RuntimeError as e:
+                print(f"{worker_id}: {e}")
+
+    async def approver():
+        # Manual approvals racing the job workers for the same group locks
+        while True:
+            group_id = f"ID-XP{random.randrange(options.groups)}GROUP"
+            lock = group_lock(group_id)
+            if lock.locked():
+                # Held in this process already; /approve answers "already being approved" here too
+                await asyncio.sleep(random.uniform(0, 0.05))
+                continue
+            try:
+                async with lock:
+                    start = time.time()
+                    await asyncio.sleep(random.uniform(0.01, 0.05))
+                    record("group", group_id, start, time.time())
+            except LockBusy:
+                db.intervals.insert_one({"kind": "busy", "key": group_id, "worker": worker_id})
+            await asyncio.sleep(random.uniform(0, 0.05))
+
+    async def main():
+        tasks = [asyncio.create_task(run_as_leader(LEADER_TASK, leader_task, options.lease))]
+        tasks += [asyncio.create_task(job_worker()) for _ in range(2)]
+        tasks.append(asyncio.create_task(approver()))
+        await asyncio.sleep(options.duration)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    asyncio.run(main())
+
+def overlaps(intervals) -> list:
+    """Pairs of intervals of different workers that overlap in time."""
+    found = []
+    ordered = sorted(intervals, key=lambda interval: interval["start"])
+    for previous, current in zip(ordered, ordered[1:]):
+        if current["start"] < previous["end"] and current["worker"] != previous["worker"]:
+            found.append((previous, current))
+    return found
+
+def check(db, options) -> bool:
+    ok = True
+    by_kind = defaultdict(lambda: defaultdict(list))  # Format: {kind: {key: [interval]}}
+    for interval in db.intervals.find({}, {"_id": 0}):
+        by_kind[interval["kind"]][interval["key"]].append(interval)
+
+    leaders = by_kind["leader"][LEADER_TASK]
+    leader_overlaps = overlaps(leaders)
+    print(f"leader:  {len(leaders)} terms by {len({term['worker'] for term in leaders})} workers, {len(leader_overlaps)} overlapping")
+    ok &= bool(leaders) and not leader_overlaps
+
+    jobs = by_kind["job"]
+    done = db.approval_jobs.count_documents({"status": "done"})
+    repeated = [key for key, runs in jobs.items() if len(runs) > 1]
+    job_overlaps = [pair for runs in jobs.values() for pair in overlaps(runs)]
+    print(f"jobs:    {done}/{options.jobs} done, {len(jobs)} ran, {len(repeated)} ran more than once, {len(job_overlaps)} overlapping")
+    ok &= done == options.jobs and len(jobs) == options.jobs and not repeated and not job_overlaps
+
+    groups = by_kind["group"]
+    held = sum(len(runs) for runs in groups.values())
+    busy = sum(len(runs) for runs in by_kind["busy"].values())
+    group_overlaps = [pair for runs in groups.values() for pair in overlaps(runs)]
+    print(f"groups:  {held} holds on {len(groups)} locks, {busy} refused as busy, {len(group_overlaps)} overlapping")
+    ok &= not group_overlaps
+
+    for previous, current in (leader_overlaps + job_overlaps + group_overlaps)[:10]:
+        print(f"  {previous['worker']} held {previous['key']} until {previous['end']:.3f}, {current['worker']} took it at {current['start']:.3f}")
+    return ok
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=15, help="seconds each process runs")
+    parser.add_argument("--lease", type=int, default=2, help="lease seconds for locks and leadership")
+    parser.add_argument("--jobs", type=int, default=200)
+    parser.add_argument("--groups", type=int, default=5, help="group locks the approvers contend for")
+    parser.add_argument("--kill-leader", action="store_true", help="SIGKILL the leader halfway through")
+    parser.add_argument("--lock-error-rate", type=float, default=0.0, help="share of lease calls that fail transiently")
+    parser.add_argument("--mongo-uri", default="mongodb://localhost:27017")
+    parser.add_argument("--db-name", default="lease_cluster")
+    parser.add_argument("--standin", action="store_true", help="use a shared in-memory mongomock database")
+    options = parser.parse_args()
+    options.standin_address = ("127.0.0.1", 0)
+
+    configure_environment(options)
+    if options.standin:
+        manager = StandinManager(address=options.standin_address, authkey=b"lease-cluster")
+        manager.start()
+        options.standin_address = manager.address
+    db = connect(options)
+    from database.jobs import create_approval_job
+    if not options.standin:
+        db.client.drop_database(options.db_name)
+    for job in range(options.jobs):
+        create_approval_job(f"ID-XP{job % options.groups}GROUP", job // options.groups)
+
+    context = multiprocessing.get_context("spawn")
+    processes = [context.Process(target=worker_main, args=(index, options)) for index in range(options.processes)]
+    for process in processes:
+        process.start()
+    print(f"Started {len(processes)} workers for {options.duration:g}s ({options.lease}s leases)")
+
+    if options.kill_leader:
+        time.sleep(options.duration / 2)
+        lock = db.locks.find_one({"_id": f"leader:{LEADER_TASK}"})
+        if lock:
+            index = int(lock["owner"].rsplit("-", 1)[1])
+            os.kill(processes[index].pid, signal.SIGKILL)
+            print(f"Killed the leader {lock['owner']}")
+
+    for process in processes:
+        process.join(options.duration + 30)
+        if process.is_alive():
+            process.kill()
+
+    ok = check(db, options)
+    print("OK" if ok else "FAILED")
+    if options.standin:
+        manager.shutdown()
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
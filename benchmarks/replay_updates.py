@@ -0,0 +1,220 @@
+"""Replay a recording of real update traffic through the bot's handlers.
+
+Recordings are written by the bot with RECORD_UPDATES=true (data/recordings/). Every
+handler plugin is loaded into a fake client that answers Telegram calls after a fixed
+latency instead of contacting Telegram, and dispatched the way Pyrogram's dispatcher
+does, against a real MongoDB. Point it at a local instance or a disposable copy: the
+replay writes users and submissions like production would.
+
+Reports per-update latency (from the recorded arrival time, so worker queueing counts)
+by command or button, plus Telegram and MongoDB call counts. Run it before and after a
+change on the same recording to compare.
+
+Usage: python benchmarks/replay_updates.py RECORDING [--speed N] [--mongo-uri URI] [--db-name NAME]
+"""
+import argparse
+import asyncio
+import gzip
+import itertools
+import json
+import logging
+import os
+import sys
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from importlib import import_module
+from pathlib import Path
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+def configure_environment(options):
+    # Must run before config is imported; the fake client never uses the credentials
+    os.environ["MONGO_DB_URI"] = options.mongo_uri
+    os.environ["MONGO_DB_NAME"] = options.db_name
+    os.environ.setdefault("API_ID", "0")
+    os.environ["RECORD_UPDATES"] = "false"
+    os.environ["SUBMISSION_BUFFER_ENABLED"] = "false"
+
+def load_recording(path: str):
+    events = []
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        try:
+            for line in f:
+                events.append(json.loads(line))
+        except (EOFError, json.JSONDecodeError):
+            # The recording was cut off (the bot died); everything up to the last sync flush is usable
+            pass
+    return events
+
+def label(event) -> str:
+    if event["kind"] == "callback":
+        return f"callback:{(event.get('data') or 'unroutable').split(':', 1)[0]}"
+    text = event.get("text") or ""
+    return f"command:{text.split()[0]}" if text.startswith("/") else "message:text"
+
+def percentile(values, share: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * share))]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("recording")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed factor; 0 replays as fast as possible")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds each fake Telegram call takes")
+    parser.add_argument("--workers", type=int, default=16, help="concurrent updates, like the client's workers")
+    parser.add_argument("--mongo-uri", default="mongodb://localhost:27017")
+    parser.add_argument("--db-name", default="replay_bench")
+    options = parser.parse_args()
+
+    configure_environment(options)
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(name)s: %(message)s")
+
+    from pymongo import monitoring
+    from pyrogram import enums, types
+    from pyrogram.handlers import MessageHandler, CallbackQueryHandler
+    from pyrogram.handlers.handler import Handler
+    from pyrogram import StopPropagation, ContinuePropagation
+    from config import ADMIN_IDS
+
+    class MongoCommandCounter(monitoring.CommandListener):
+        def __init__(self):
+            self.counts = Counter()
+
+        def started(self, event):
+            self.counts[event.command_name] += 1
+
+        def succeeded(self, event):
+            pass
+
+        def failed(self, event):
+            pass
+
+    class FakeClient:
+        """Enough of pyrogram.Client for the handlers: calls are counted and answered locally."""
+
+        def __init__(self, latency: float):
+            self.latency = latency
+            self.calls = Counter()
+            self.groups = {}  # Format: {group: [handler]}, like Dispatcher.groups
+            self.me = types.User(id=1, is_bot=True, first_name="Replay", username="replay_bot")
+            self.loop = asyncio.get_running_loop()
+            self.executor = ThreadPoolExecutor(8)
+            self._message_ids = itertools.count(1)
+
+        def add_handler(self, handler, group: int = 0):
+            self.groups.setdefault(group, []).append(handler)
+            self.groups = dict(sorted(self.groups.items()))
+
+        def remove_handler(self, handler, group: int = 0):
+            self.groups[group].remove(handler)
+
+        def load_plugins(self, root: str = "handlers"):
+            # Same discovery as Client.load_plugins
+            for path in sorted(Path(ROOT, root).rglob("*.py")):
+                module = import_module(".".join(path.relative_to(ROOT).with_suffix("").parts))
+                for name in vars(module).keys():
+                    for handler, group in getattr(getattr(module, name), "handlers", []):
+                        if isinstance(handler, Handler) and isinstance(group, int):
+                            self.add_handler(handler, group)
+
+        def message(self, chat_id: int, text: str = None, from_user=None):
+            return types.Message(
+                client=self,
+                id=next(self._message_ids),
+                chat=types.Chat(id=chat_id, type=enums.ChatType.PRIVATE),
+                from_user=from_user or self.me,
+                text=text
+            )
+
+        def __getattr__(self, name: str):
+            async def call(*args, **kwargs):
+                self.calls[name] += 1
+                await asyncio.sleep(self.latency)
+                if name.startswith(("send_", "edit_message", "copy_message", "forward_")):
+                    return self.message(kwargs.get("chat_id", args[0] if args else 0))
+                if name == "get_chat_member":
+                    return types.ChatMember(client=self, status=enums.ChatMemberStatus.MEMBER)
+                if name == "get_chat":
+                    return types.Chat(id=kwargs.get("chat_id", 0), type=enums.ChatType.CHANNEL, username="replay_channel")
+                return True
+            return call
+
+        async def dispatch(self, update):
+            handler_type = CallbackQueryHandler if isinstance(update, types.CallbackQuery) else MessageHandler
+            for group in list(self.groups.values()):
+                for handler in list(group):
+                    if not isinstance(handler, handler_type):
+                        continue
+                    try:
+                        if await handler.check(self, update):
+                            await handler.callback(self, update)
+                            break
+                    except StopPropagation:
+                        return
+                    except ContinuePropagation:
+                        continue
+                    except Exception as e:
+                        logging.getLogger("replay").error(f"Handler {handler.callback.__name__} failed: {e}")
+                        break
+
+    def build_update(client: FakeClient, event):
+        user_id = ADMIN_IDS[0] if event["admin"] else event["user"]
+        user = types.User(id=user_id, is_bot=False, first_name="User")
+        if event["kind"] == "callback":
+            return types.CallbackQuery(
+                client=client,
+                id=str(next(client._message_ids)),
+                from_user=user,
+                chat_instance="replay",
+                message=client.message(user_id),
+                data=event.get("data") or ""
+            )
+        return client.message(user_id, text=event.get("text") or "", from_user=user)
+
+    async def replay():
+        mongo = MongoCommandCounter()
+        monitoring.register(mongo)
+        events = load_recording(options.recording)
+        if not events:
+            print("Recording is empty.")
+            return
+
+        client = FakeClient(options.latency)
+        client.load_plugins()
+        semaphore = asyncio.Semaphore(options.workers)
+        latencies = defaultdict(list)  # Format: {label: [seconds]}
+        started = time.perf_counter()
+
+        async def run(event):
+            due = started + (event["t"] / options.speed if options.speed > 0 else 0)
+            await asyncio.sleep(max(0.0, due - time.perf_counter()))
+            arrived = time.perf_counter()
+            async with semaphore:
+                await client.dispatch(build_update(client, event))
+            latencies[label(event)].append(time.perf_counter() - arrived)
+
+        await asyncio.gather(*(run(event) for event in events))
+        elapsed = time.perf_counter() - started
+
+        print(f"Replayed {len(events)} updates in {elapsed:.1f}s ({f'{options.speed:g}x' if options.speed > 0 else 'max'} speed, {options.latency * 1000:.0f} ms per Telegram call)\n")
+        print(f"{'update':<32} {'count':>6} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+        everything = []
+        for name, values in sorted(latencies.items(), key=lambda item: -len(item[1])):
+            everything += values
+            print(f"{name:<32} {len(values):>6} {percentile(values, 0.5) * 1000:>8.1f} {percentile(values, 0.95) * 1000:>8.1f} {max(values) * 1000:>8.1f}")
+        print(f"{'all':<32} {len(everything):>6} {percentile(everything, 0.5) * 1000:>8.1f} {percentile(everything, 0.95) * 1000:>8.1f} {max(everything) * 1000:>8.1f}")
+
+        print(f"\nTelegram calls ({sum(client.calls.values())}, {sum(client.calls.values()) / len(events):.2f} per update):")
+        for name, count in client.calls.most_common():
+            print(f"  {name:<28} {count:>6}")
+        print(f"\nMongoDB commands ({sum(mongo.counts.values())}, {sum(mongo.counts.values()) / len(events):.2f} per update):")
+        for name, count in mongo.counts.most_common():
+            print(f"  {name:<28} {count:>6}")
+        client.executor.shutdown(wait=False)
+
+    asyncio.run(replay())
+
+if __name__ == "__main__":
+    main()
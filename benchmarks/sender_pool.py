@@ -0,0 +1,108 @@
+"""Measure mass-notification throughput as sender bots are added to the pool.
+
+Each fake bot enforces its own Telegram-like rate budget and per-call latency. A bot can
+only message users who started it, so each extra sender reaches just a share of the
+recipients (--started, independently per sender), as recorded from their /start; a few
+of those have blocked it since (--blocked) and fail over to the main bot, as they would
+in production. Sends are issued in concurrent batches the way broadcasts and approval
+notifications are, with reachability loaded once per batch.
+
+Usage: python benchmarks/sender_pool.py [--recipients N] [--rate R] [--started F] [--blocked F]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# The pool reads its settings from config; the fake bots never use the credentials
+os.environ.setdefault("API_ID", "0")
+
+from pyrogram.errors import UserIsBlocked  # noqa: E402
+from utils.ratelimit import AsyncTokenBucket  # noqa: E402
+import utils.senders  # noqa: E402
+from utils.senders import SenderPool  # noqa: E402
+
+class FakeBot:
+    """Stands in for a Client: rate-limited sends with fixed latency."""
+
+    def __init__(self, name: str, rate: float, latency: float, unreachable=frozenset()):
+        self.name = name
+        self.me = type("User", (), {"id": hash(name)})()
+        self.bucket = AsyncTokenBucket(rate, 1)
+        self.latency = latency
+        self.unreachable = unreachable
+        self.calls = 0
+
+    async def send_message(self, chat_id: int, text: str):
+        await self.bucket.acquire()
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        if chat_id in self.unreachable:
+            raise UserIsBlocked()
+
+async def run(senders: int, recipients, options) -> tuple[float, list, int, float]:
+    rng = random.Random(senders)
+    primary = FakeBot("main", options.rate, options.latency)
+    pool = SenderPool()
+    reach = {}  # Format: {chat_id: {sender_id}}, what the sender_reach collection would hold
+    for i in range(senders - 1):
+        started = rng.sample(recipients, int(len(recipients) * options.started))
+        blocked = frozenset(rng.sample(started, int(len(started) * options.blocked)))
+        bot = FakeBot(f"sender_{i}", options.rate, options.latency, blocked)
+        pool.clients.append(bot)
+        pool.sender_ids.append(bot.me.id)
+        for chat_id in started:
+            reach.setdefault(chat_id, set()).add(bot.me.id)
+
+    # The main bot alone must reach everyone no sender can, which caps the speedup (SenderPool.capacity)
+    unreachable = sum(1 for chat_id in recipients if chat_id not in reach)
+    ceiling = min(senders, len(recipients) / max(1, unreachable))
+    fallbacks = 0
+
+    def mark_sender_unreachable(sender_id, chat_id):
+        nonlocal fallbacks
+        fallbacks += 1
+        reach[chat_id].discard(sender_id)
+    utils.senders.mark_sender_unreachable = mark_sender_unreachable
+
+    batch_size = options.batch * pool.size
+    started = time.perf_counter()
+    for start in range(0, len(recipients), batch_size):
+        batch = recipients[start:start + batch_size]
+        # One sender_reach query per batch in production
+        reachable = {chat_id: set(reach[chat_id]) for chat_id in batch if chat_id in reach}
+        await asyncio.gather(*(
+            pool.deliver(
+                chat_id,
+                lambda bot, chat_id=chat_id: bot.send_message(chat_id, "hello"),
+                primary=primary,
+                reachable=reachable.get(chat_id, ())
+            )
+            for chat_id in batch
+        ))
+    return time.perf_counter() - started, [primary.calls] + [bot.calls for bot in pool.clients], fallbacks, ceiling
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--recipients", type=int, default=2000)
+    parser.add_argument("--rate", type=float, default=200, help="messages per second each fake bot allows")
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds per send")
+    parser.add_argument("--batch", type=int, default=20, help="sends in flight per sender (BROADCAST_BATCH_SIZE)")
+    parser.add_argument("--started", type=float, default=0.3, help="share of users who started each extra bot")
+    parser.add_argument("--blocked", type=float, default=0.05, help="share of those who have blocked it since")
+    options = parser.parse_args()
+
+    recipients = list(range(10_000_000, 10_000_000 + options.recipients))
+    print(f"{'senders':>7} {'seconds':>8} {'msgs/s':>8} {'speedup':>8} {'ceiling':>8} {'fallbacks':>9}   calls per bot (main first)")
+    baseline = None
+    for senders in (1, 2, 4, 8):
+        seconds, calls, fallbacks, ceiling = asyncio.run(run(senders, recipients, options))
+        throughput = len(recipients) / seconds
+        baseline = baseline or throughput
+        print(f"{senders:>7} {seconds:>8.2f} {throughput:>8.0f} {throughput / baseline:>7.2f}x {ceiling:>7.2f}x {fallbacks:>9}   {calls}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""Measure the cost of rendering the bot's pages: building keyboards and texts per update vs reusing them.
+
+Compares the previous handlers, which built every InlineKeyboardMarkup and page text
+inside the handler, with the prebuilt and cached pages from utils/ui.py, for the pages
+users navigate most. Reports time and allocated bytes per page.
+
+Usage: python benchmarks/ui_markups.py [--iterations N]
+"""
+import argparse
+import os
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("API_ID", "0")
+
+from pyrogram.types import InlineKeyboardMarkup, InlineKeyboardButton  # noqa: E402
+from config import REQUIRED_CHANNELS, SUPPORT_GROUP_URL, SOURCE_CODE_URL, BOT_NAME, BOT_USERNAME, OWNER_USERNAME  # noqa: E402
+from utils.router import callback_data  # noqa: E402
+from utils import ui  # noqa: E402
+
+LIMITS = [50, 100, 200, 500]
+GROUP = {"group_id": "ID-XP100GROUP-3", "limit": 100, "current_users": 42, "status": "active"}
+
+def old_home():
+    return InlineKeyboardMarkup([
+        [
+            InlineKeyboardButton("➕ Add Number", callback_data="submit_numbers"),
+            InlineKeyboardButton("📁 My Submissions", callback_data="my_submissions")
+        ],
+        [
+            InlineKeyboardButton("💡 Tutorial", callback_data="tutorial"),
+            InlineKeyboardButton("ℹ️ About Bot", callback_data="about_bot")
+        ]
+    ])
+
+def old_about():
+    text = (
+        "<b>⍟───[ ᴍʏ ᴅᴇᴛᴀɪʟꜱ ]───⍟</b>\n\n"
+        "<blockquote>"
+        f"‣ ᴍʏ ɴᴀᴍᴇ : <a href=\"https://t.me/{BOT_USERNAME}\">{BOT_NAME}</a> 🔍\n"
+        "‣ ᴍʏ ʙᴇsᴛ ғʀɪᴇɴᴅ : <a href=\"tg://settings\">ᴛʜɪs ᴘᴇʀsᴏɴ</a>\n"
+        f"‣ ᴅᴇᴠᴇʟᴏᴘᴇʀ : <a href=\"https://t.me/{OWNER_USERNAME}\">ᴏᴡɴᴇʀ</a>\n"
+        "‣ ʟɪʙʀᴀʀʏ : <a href=\"https://docs.pyrogram.org/\">ᴘʏʀᴏɢʀᴀᴍ</a>\n"
+        "‣ ʟᴀɴɢᴜᴀɢᴇ : <a href=\"https://www.python.org/download/releases/3.0/\">ᴘʏᴛʜᴏɴ 3</a>\n"
+        "‣ ᴅᴀᴛᴀʙᴀsᴇ : <a href=\"https://www.mongodb.com/\">ᴍᴏɴɢᴏ ᴅʙ</a>\n"
+        "‣ ʙᴏᴛ sᴇʀᴠᴇʀ : <a href=\"https://heroku.com/\">ʜᴇʀᴏᴋᴜ</a>\n"
+        "‣ ʙᴜɪʟᴅ sᴛᴀᴛᴜs : <a href=\"#\">ᴠ1.0 [sᴛᴀʙʟᴇ]</a>"
+        "</blockquote>"
+    )
+    markup = InlineKeyboardMarkup([
+        [
+            InlineKeyboardButton("👥 Support Group", url=SUPPORT_GROUP_URL),
+            InlineKeyboardButton("⚙️ Source Code", url=SOURCE_CODE_URL)
+        ],
+        [
+            InlineKeyboardButton("➕ Add Number", callback_data="submit_numbers"),
+            InlineKeyboardButton("🏠 Back to Home", callback_data="back_to_home")
+        ]
+    ])
+    return text, markup
+
+def old_subscribe():
+    buttons = [
+        [InlineKeyboardButton(f"Join {channel['name']}", url=channel["url"])]
+        for channel in REQUIRED_CHANNELS
+    ]
+    buttons.append([InlineKeyboardButton("✅ Check Subscription", callback_data="check_subscription")])
+    text = (
+        "📢 Please join our channel(s) to use the bot:\n\n"
+        + "\n".join([f"- {channel['name']}" for channel in REQUIRED_CHANNELS])
+        + "\n\nClick the button(s) below to join, then press 'Check Subscription'."
+    )
+    return text, InlineKeyboardMarkup(buttons)
+
+def old_group_select():
+    buttons = [
+        [InlineKeyboardButton(f"👥 {limit} VCF GROUP 👥", callback_data=callback_data("select_group", limit))]
+        for limit in LIMITS
+    ]
+    buttons.append([InlineKeyboardButton("🏠 Back to Home", callback_data="back_to_home")])
+    return InlineKeyboardMarkup(buttons)
+
+def old_group_info():
+    group = GROUP
+    markup = InlineKeyboardMarkup([
+        [InlineKeyboardButton("📤 Submit My Number", callback_data=callback_data("submit_my_number", group["group_id"]))],
+        [InlineKeyboardButton("⏮️ Back To Select Group", callback_data="submit_numbers")],
+        [InlineKeyboardButton("🏠 Back to Home", callback_data="back_to_home")]
+    ])
+    text = (
+        f"📦 Group: {group['limit']} Users VCF\n"
+        f"👥 Current Members: {group['current_users']}/{group['limit']}\n"
+        f"📅 Status: {group['status'].capitalize()}\n\n"
+        "ℹ️ Once this group is full, the admin will approve it and share the VCF file on our download channel."
+    )
+    return text, markup
+
+def new_home():
+    return ui.HOME_MARKUP
+
+def new_about():
+    return ui.ABOUT_TEXT, ui.ABOUT_MARKUP
+
+def new_subscribe():
+    return ui.SUBSCRIBE_TEXT, ui.SUBSCRIBE_MARKUP
+
+def new_group_select():
+    return ui.group_select_markup(tuple(LIMITS))
+
+def new_group_info():
+    group = GROUP
+    text = ui.GROUP_INFO_TEMPLATE.format(
+        limit=group["limit"],
+        current_users=group["current_users"],
+        status=group["status"].capitalize()
+    )
+    return text, ui.group_info_markup(group["group_id"])
+
+PAGES = [
+    ("home", old_home, new_home),
+    ("about", old_about, new_about),
+    ("subscribe", old_subscribe, new_subscribe),
+    ("group select", old_group_select, new_group_select),
+    ("group info", old_group_info, new_group_info),
+]
+
+def allocated(func, calls: int = 1000) -> float:
+    """Bytes allocated per call, kept alive the way a handler holds a page until it is sent."""
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    pages = [func() for _ in range(calls)]
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del pages
+    return (peak - before) / calls
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20000)
+    options = parser.parse_args()
+
+    print(f"{'page':<14} {'rebuilt ns':>11} {'reused ns':>10} {'rebuilt B':>10} {'reused B':>9}")
+    for name, old, new in PAGES:
+        new()  # Warm the caches, as the first update after startup does
+        old_ns, new_ns = (
+            min(timeit.repeat(func, number=options.iterations, repeat=3)) / options.iterations * 1e9
+            for func in (old, new)
+        )
+        print(f"{name:<14} {old_ns:>11.0f} {new_ns:>10.0f} {allocated(old):>10.0f} {allocated(new):>9.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -1,29 +1,136 @@
-import logging
-from pymongo import MongoClient
-from config import MONGO_DB_URI, MONGO_DB_NAME
-
-# Setup logging
-logger = logging.getLogger(__name__)
-
-# Initialize MongoDB client and database
-client = None
-db = None
-
-def connect_to_mongo():
-    """Establish connection to MongoDB database."""
-    global client, db
-    try:
-        client = MongoClient(MONGO_DB_URI)
-        db = client[MONGO_DB_NAME]
-        logger.info("Connected to MongoDB successfully")
-        return db
-    except Exception as e:
-        logger.error(f"Failed to connect to MongoDB: {e}")
-        raise
-
-def get_db():
-    """Get the MongoDB database instance, connecting if not already connected."""
-    global db
-    if db is None:
-        connect_to_mongo()
-    return db
\ No newline at end of file
+import logging
+import threading
+import time
+from pymongo import MongoClient
+from pymongo.monitoring import ConnectionPoolListener
+from config import (
+    MONGO_DB_URI, MONGO_DB_NAME, MONGO_MAX_POOL_SIZE, MONGO_MIN_POOL_SIZE, MONGO_WAIT_QUEUE_TIMEOUT_MS,
+    MONGO_SERVER_SELECTION_TIMEOUT_MS, MONGO_CONNECT_TIMEOUT_MS, MONGO_SOCKET_TIMEOUT_MS, MONGO_COMPRESSORS,
+    MONGO_READ_PREFERENCE, MONGO_RETRY_WRITES, MONGO_RETRY_READS, MONGO_APP_NAME, MONGO_CONNECT_RETRIES,
+    TRACING_ENABLED
+)
+from database.indexes import ensure_indexes
+from database.migrations import migrate_legacy_submissions, stamp_counter_shards
+from database.retry import with_retry
+from utils import metrics
+from utils.tracing import TracingCommandListener
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Initialize MongoDB client and database
+client = None
+db = None
+
+class PoolMetricsListener(ConnectionPoolListener):
+    """Publish connection pool checkout wait and usage to the metrics registry.
+
+    Checkout started and finished events fire on the thread doing the checkout, so the start
+    time is kept in a thread-local.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._in_use = 0
+        self._lock = threading.Lock()
+
+    def _waited(self) -> float:
+        started = getattr(self._local, "started", None)
+        return time.perf_counter() - started if started is not None else 0.0
+
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+
+    def connection_checked_out(self, event):
+        metrics.observe("mongo_pool_checkout_wait_seconds", self._waited())
+        with self._lock:
+            self._in_use += 1
+            metrics.set_gauge("mongo_pool_connections_in_use", self._in_use)
+
+    def connection_check_out_failed(self, event):
+        metrics.observe("mongo_pool_checkout_wait_seconds", self._waited())
+        metrics.inc("mongo_pool_checkout_failures_total", reason=event.reason)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self._in_use = max(0, self._in_use - 1)
+            metrics.set_gauge("mongo_pool_connections_in_use", self._in_use)
+
+    def connection_created(self, event):
+        metrics.inc("mongo_pool_connections_created_total")
+
+    def connection_closed(self, event):
+        metrics.inc("mongo_pool_connections_closed_total", reason=event.reason)
+
+    def pool_cleared(self, event):
+        logger.warning(f"MongoDB connection pool for {event.address} was cleared")
+        metrics.inc("mongo_pool_cleared_total")
+
+    def connection_ready(self, event):
+        pass
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+def _client_options() -> dict:
+    options = {
+        "maxPoolSize": MONGO_MAX_POOL_SIZE,
+        "minPoolSize": MONGO_MIN_POOL_SIZE,
+        "waitQueueTimeoutMS": MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "connectTimeoutMS": MONGO_CONNECT_TIMEOUT_MS,
+        "socketTimeoutMS": MONGO_SOCKET_TIMEOUT_MS,
+        "readPreference": MONGO_READ_PREFERENCE,
+        "retryWrites": MONGO_RETRY_WRITES,
+        "retryReads": MONGO_RETRY_READS,
+        "appname": MONGO_APP_NAME,
+        "event_listeners": [PoolMetricsListener()]
+    }
+    if MONGO_COMPRESSORS:
+        options["compressors"] = MONGO_COMPRESSORS
+    if TRACING_ENABLED:
+        options["event_listeners"].append(TracingCommandListener())
+    return options
+
+def connect_to_mongo():
+    """Establish connection to MongoDB database and verify it with a ping."""
+    global client, db
+    try:
+        client = MongoClient(MONGO_DB_URI, **_client_options())
+        # MongoClient connects lazily; ping so a bad URI or unreachable cluster fails at startup
+        with_retry(client.admin.command, "ping", retries=MONGO_CONNECT_RETRIES)
+        db = client[MONGO_DB_NAME]
+        logger.info(f"Connected to MongoDB successfully (pool {MONGO_MIN_POOL_SIZE}-{MONGO_MAX_POOL_SIZE}, app {MONGO_APP_NAME})")
+        # ensure_indexes raises transient errors, so a brief outage at startup is retried rather than skipped
+        with_retry(ensure_indexes, db)
+        # Runs after the indexes exist, so the backfill's upserts are deduplicated by them
+        migrate_legacy_submissions(db)
+        stamp_counter_shards(db)
+        return db
+    except Exception as e:
+        logger.error(f"Failed to connect to MongoDB: {e}")
+        raise
+
+def get_db():
+    """Get the MongoDB database instance, connecting if not already connected."""
+    global db
+    if db is None:
+        connect_to_mongo()
+    return db
+
+def ping() -> bool:
+    """Check that MongoDB answers, for health probes."""
+    if client is None:
+        return False
+    try:
+        client.admin.command("ping")
+        return True
+    except Exception as e:
+        logger.warning(f"MongoDB ping failed: {e}")
+        return False
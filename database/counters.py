@@ -0,0 +1,106 @@
+import logging
+import random
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import PyMongoError, DuplicateKeyError
+from datetime import datetime
+from database.connection import get_db
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+def shard_caps(limit: int, shards: int):
+    """Split a group's limit into per-shard seat caps that add up to exactly `limit`."""
+    base, extra = divmod(limit, shards)
+    return [base + (1 if shard < extra else 0) for shard in range(shards)]
+
+def _shard_id(group_id: str, generation: int, shard: int) -> str:
+    return f"{group_id}:{generation}:{shard}"
+
+def reserve_counter_seat(group_id: str, generation: int, limit: int, shards: int):
+    """Take one seat from a random shard of the group generation's counter.
+
+    Shards are tried in random order, so concurrent reservations usually update different
+    documents. Shard documents are created on first use. Returns the reserved shard as
+    {"shard", "count", "cap"}, or None if every shard is full or sealed.
+    """
+    db = get_db()
+    caps = shard_caps(limit, shards)
+    order = [shard for shard in range(shards) if caps[shard] > 0]
+    random.shuffle(order)
+    for shard in order:
+        try:
+            counter = db.group_counters.find_one_and_update(
+                {
+                    "_id": _shard_id(group_id, generation, shard),
+                    "count": {"$lt": caps[shard]},
+                    "sealed": {"$ne": True}
+                },
+                {
+                    "$inc": {"count": 1},
+                    "$setOnInsert": {"group_id": group_id, "generation": generation, "shard": shard, "cap": caps[shard]}
+                },
+                upsert=True,
+                projection={"_id": 0, "shard": 1, "count": 1, "cap": 1},
+                return_document=ReturnDocument.AFTER
+            )
+            return counter
+        except DuplicateKeyError:
+            # The shard exists but is full or sealed, so the upsert collided on _id
+            continue
+        except PyMongoError as e:
+            logger.error(f"Failed to reserve a seat in shard {shard} of group {group_id}: {e}")
+            return None
+    return None
+
+def release_counter_seat(group_id: str, generation: int) -> bool:
+    """Give back one seat taken with reserve_counter_seat.
+
+    Sealed shards still give seats back, so their sum stays the number of rows a frozen
+    generation will end up with.
+    """
+    db = get_db()
+    try:
+        result = db.group_counters.update_one(
+            {"group_id": group_id, "generation": generation, "count": {"$gt": 0}},
+            {"$inc": {"count": -1}}
+        )
+        return result.modified_count > 0
+    except PyMongoError as e:
+        logger.error(f"Failed to release a counter seat in group {group_id}: {e}")
+        return False
+
+def sum_counter_shards(group_id: str, generation: int):
+    """Total seats taken in a group generation, or None if the shards could not be read."""
+    db = get_db()
+    try:
+        return sum(
+            counter["count"]
+            for counter in db.group_counters.find({"group_id": group_id, "generation": generation}, {"_id": 0, "count": 1})
+        )
+    except PyMongoError as e:
+        logger.error(f"Failed to sum counter shards of group {group_id}: {e}")
+        return None
+
+def seal_counter_shards(group_id: str, generation: int, shards: int) -> bool:
+    """Stop all reservations into a generation, including shards that were never used yet.
+
+    Sealed shards are purged by the TTL index on sealed_at.
+    """
+    db = get_db()
+    try:
+        now = datetime.now()
+        db.group_counters.bulk_write([
+            UpdateOne(
+                {"_id": _shard_id(group_id, generation, shard)},
+                {
+                    "$set": {"sealed": True, "sealed_at": now},
+                    "$setOnInsert": {"group_id": group_id, "generation": generation, "shard": shard, "count": 0, "cap": 0}
+                },
+                upsert=True
+            )
+            for shard in range(shards)
+        ], ordered=False)
+        return True
+    except PyMongoError as e:
+        logger.error(f"Failed to seal counter shards of group {group_id} (generation {generation}): {e}")
+        return False
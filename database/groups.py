@@ -1,115 +1,456 @@
-import logging
-from pymongo.errors import PyMongoError
-from datetime import datetime
-from database.connection import get_db
-
-# Setup logging
-logger = logging.getLogger(__name__)
-
-def add_group(limit: int) -> bool:
-    """Add a new VCF group with a fixed group ID."""
-    db = get_db()
-    try:
-        group_id = f"ID-XP{limit}GROUP"
-        existing_group = db.groups.find_one({"group_id": group_id})
-        if existing_group:
-            logger.warning(f"Group {group_id} already exists")
-            return False
-        group = {
-            "group_id": group_id,
-            "limit": limit,
-            "current_users": 0,
-            "status": "active",
-            "created_at": datetime.now(),
-            "updated_at": datetime.now()
-        }
-        result = db.groups.insert_one(group)
-        logger.info(f"Added group {group_id} with limit {limit}")
-        return result.inserted_id is not None
-    except PyMongoError as e:
-        logger.error(f"Failed to add group with limit {limit}: {e}")
-        return False
-
-def get_active_groups_by_limit(limit: int):
-    """Fetch or create a single active group for a given limit."""
-    db = get_db()
-    try:
-        group_id = f"ID-XP{limit}GROUP"
-        group = db.groups.find_one({"group_id": group_id, "status": "active"})
-        if not group:
-            logger.info(f"No active group for limit {limit}, creating a new one")
-            if add_group(limit):
-                group = db.groups.find_one({"group_id": group_id, "status": "active"})
-            else:
-                return []
-        return [group]
-    except PyMongoError as e:
-        logger.error(f"Failed to fetch active groups with limit {limit}: {e}")
-        return []
-
-def get_group(group_id: str):
-    """Fetch group details by group_id."""
-    db = get_db()
-    try:
-        group = db.groups.find_one({"group_id": group_id})
-        return group
-    except PyMongoError as e:
-        logger.error(f"Failed to fetch group {group_id}: {e}")
-        return None
-
-def get_all_groups():
-    """Fetch all groups from the database."""
-    db = get_db()
-    try:
-        groups = db.groups.find()
-        logger.info("Fetched all groups for stats")
-        return groups
-    except PyMongoError as e:
-        logger.error(f"Failed to fetch all groups: {e}")
-        return []
-
-def update_group_status(group_id: str, status: str):
-    """Update the status of a group (e.g., active, full, approved)."""
-    db = get_db()
-    try:
-        result = db.groups.update_one(
-            {"group_id": group_id},
-            {"$set": {"status": status, "updated_at": datetime.now()}}
-        )
-        if result.modified_count > 0:
-            logger.info(f"Updated group {group_id} status to {status}")
-        else:
-            logger.warning(f"No group found with group_id {group_id} for status update")
-        return result.modified_count > 0
-    except PyMongoError as e:
-        logger.error(f"Failed to update group {group_id} status to {status}: {e}")
-        return False
-
-def increment_group_users(group_id: str):
-    """Increment the current_users count for a group and check if it's full."""
-    db = get_db()
-    try:
-        group = db.groups.find_one({"group_id": group_id})
-        if not group:
-            logger.warning(f"Group {group_id} not found for increment")
-            return False
-
-        new_count = group["current_users"] + 1
-        update_data = {
-            "current_users": new_count,
-            "updated_at": datetime.now()
-        }
-        if new_count >= group["limit"]:
-            update_data["status"] = "full"
-
-        result = db.groups.update_one(
-            {"group_id": group_id},
-            {"$set": update_data}
-        )
-        if result.modified_count > 0:
-            logger.info(f"Incremented users for group {group_id} to {new_count}")
-            return True
-        return False
-    except PyMongoError as e:
-        logger.error(f"Failed to increment users for group {group_id}: {e}")
-        return False
\ No newline at end of file
+import logging
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError, DuplicateKeyError
+from datetime import datetime
+from config import GROUP_CACHE_SIZE, GROUP_CACHE_TTL, GROUP_COUNTER_SHARDS
+from database.connection import get_db
+from database.counters import reserve_counter_seat, release_counter_seat, sum_counter_shards, seal_counter_shards
+from database.retry import with_retry
+from utils.cache import LRUCache
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Attempts at opening a pool instance before giving up under heavy contention
+MAX_OPEN_ATTEMPTS = 5
+
+# Fields shown on a user's "My Submissions" card
+GROUP_CARD_FIELDS = {"_id": 0, "group_id": 1, "limit": 1, "status": 1, "current_users": 1, "generation": 1, "counter_shards": 1}
+
+# Group cards by group_id; written through on seat reservations and dropped on every other group change
+group_cache = LRUCache(GROUP_CACHE_SIZE, ttl=GROUP_CACHE_TTL, name="groups")  # Format: {group_id: card}
+
+def pool_group_id(limit: int, instance: int) -> str:
+    """Return the group ID of a pool instance; the first instance keeps the original fixed ID."""
+    return f"ID-XP{limit}GROUP" if instance == 1 else f"ID-XP{limit}GROUP-{instance}"
+
+def group_counter_shards(group: dict) -> int:
+    """Seat counter shards of the group's current generation.
+
+    The count is fixed when a generation starts, so changing GROUP_COUNTER_SHARDS only
+    applies from the next generation on; generations without it were counted on the group
+    document.
+    """
+    return group.get("counter_shards", 1)
+
+def _new_group(limit: int, instance: int, status: str = "active") -> dict:
+    return {
+        "group_id": pool_group_id(limit, instance),
+        "limit": limit,
+        "instance": instance,
+        "current_users": 0,
+        "generation": 0,
+        "counter_shards": GROUP_COUNTER_SHARDS,
+        "status": status,
+        "created_at": datetime.now(),
+        "updated_at": datetime.now()
+    }
+
+def add_group(limit: int) -> bool:
+    """Add a new VCF group pool for a limit, starting with its fixed-ID first instance."""
+    db = get_db()
+    try:
+        group_id = pool_group_id(limit, 1)
+        existing_group = db.groups.find_one({"group_id": group_id})
+        if existing_group:
+            logger.warning(f"Group {group_id} already exists")
+            return False
+        result = db.groups.insert_one(_new_group(limit, 1))
+        logger.info(f"Added group {group_id} with limit {limit}")
+        return result.inserted_id is not None
+    except DuplicateKeyError:
+        logger.warning(f"Group pool for limit {limit} already has an active instance")
+        return False
+    except PyMongoError as e:
+        logger.error(f"Failed to add group with limit {limit}: {e}")
+        return False
+
+def _open_group_instance(limit: int):
+    """Open the next pool instance for a limit, reusing an approved standby instance first.
+
+    The unique partial index on active groups per limit makes this atomic: if another
+    request opens an instance first, our insert/promotion fails and the caller re-reads.
+    """
+    db = get_db()
+    try:
+        group = db.groups.find_one_and_update(
+            {"limit": limit, "status": "standby"},
+            {"$set": {"status": "active", "updated_at": datetime.now()}},
+            sort=[("instance", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+        if group:
+            group_cache.pop(group["group_id"])
+            logger.info(f"Promoted standby group {group['group_id']} for limit {limit}")
+            return group
+
+        # Seed the counter with the pool's highest instance, so it never hands out an ID that is
+        # taken (instance 1 from add_group, or pools from before the counter existed)
+        highest = db.groups.find_one({"limit": limit}, {"_id": 0, "instance": 1}, sort=[("instance", -1)])
+        db.counters.update_one(
+            {"_id": f"group_pool_{limit}"},
+            {"$max": {"seq": highest.get("instance", 1) if highest else 0}},
+            upsert=True
+        )
+        counter = db.counters.find_one_and_update(
+            {"_id": f"group_pool_{limit}"},
+            {"$inc": {"seq": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        group = _new_group(limit, counter["seq"])
+        db.groups.insert_one(group)
+        logger.info(f"Opened group {group['group_id']} for limit {limit}")
+        return group
+    except DuplicateKeyError:
+        # Another request opened an instance (or the ID is taken); caller retries the lookup
+        return None
+
+def get_active_groups_by_limit(limit: int):
+    """Fetch the currently filling group of a limit's pool, opening a new instance if needed."""
+    db = get_db()
+    try:
+        for _ in range(MAX_OPEN_ATTEMPTS):
+            group = db.groups.find_one({"limit": limit, "status": "active"})
+            if group:
+                return [group]
+            logger.info(f"No active group for limit {limit}, opening a new instance")
+            group = _open_group_instance(limit)
+            if group:
+                return [group]
+        logger.error(f"Could not open an active group for limit {limit} after {MAX_OPEN_ATTEMPTS} attempts")
+        return []
+    except PyMongoError as e:
+        logger.error(f"Failed to fetch active groups with limit {limit}: {e}")
+        return []
+
+def get_group_limits():
+    """Return the distinct group limits (one pool per limit), sorted ascending."""
+    db = get_db()
+    try:
+        return sorted(db.groups.distinct("limit"))
+    except PyMongoError as e:
+        logger.error(f"Failed to fetch group limits: {e}")
+        return []
+
+def get_group(group_id: str, retry: bool = False):
+    """Fetch group details by group_id.
+
+    With `retry`, transient errors are retried with backoff; that sleeps, so only pass it
+    from worker threads, never from handlers on the event loop.
+    """
+    db = get_db()
+    try:
+        if retry:
+            return with_retry(db.groups.find_one, {"group_id": group_id})
+        group = db.groups.find_one({"group_id": group_id})
+        return group
+    except PyMongoError as e:
+        logger.error(f"Failed to fetch group {group_id}: {e}")
+        return None
+
+def get_all_groups():
+    """Fetch all groups from the database."""
+    db = get_db()
+    try:
+        groups = db.groups.find()
+        logger.info("Fetched all groups for stats")
+        return groups
+    except PyMongoError as e:
+        logger.error(f"Failed to fetch all groups: {e}")
+        return []
+
+def get_full_groups(full_before: datetime = None, limit: int = None, projection: dict = None):
+    """Fetch groups waiting for approval through the (status, updated_at) index, oldest first."""
+    db = get_db()
+    try:
+        query = {"status": "full"}
+        if full_before is not None:
+            query["updated_at"] = {"$lte": full_before}
+        if limit is not None:
+            query["limit"] = limit
+        return with_retry(lambda: list(db.groups.find(query, projection).sort("updated_at", 1)))
+    except PyMongoError as e:
+        logger.error(f"Failed to fetch full groups: {e}")
+        return []
+
+def get_groups_by_status(status: str, limit: int = None):
+    """Fetch non-empty groups with the given status, optionally restricted to one limit."""
+    db = get_db()
+    try:
+        query = {"status": status, "current_users": {"$gt": 0}}
+        if limit is not None:
+            query["limit"] = limit
+        return with_retry(lambda: list(db.groups.find(query, {"group_id": 1}).sort("updated_at", 1)))
+    except PyMongoError as e:
+        logger.error(f"Failed to fetch {status} groups: {e}")
+        return []
+
+def get_sharded_active_groups():
+    """Fetch the filling groups whose current generation counts seats in counter shards."""
+    db = get_db()
+    try:
+        return with_retry(lambda: list(db.groups.find(
+            {"status": "active", "counter_shards": {"$gt": 1}},
+            {"_id": 0, "group_id": 1, "generation": 1}
+        )))
+    except PyMongoError as e:
+        logger.error(f"Failed to fetch sharded active groups: {e}")
+        return []
+
+def update_group_status(group_id: str, status: str):
+    """Update the status of a group (e.g., active, full, standby)."""
+    db = get_db()
+    try:
+        result = db.groups.update_one(
+            {"group_id": group_id},
+            {"$set": {"status": status, "updated_at": datetime.now()}}
+        )
+        group_cache.pop(group_id)
+        if result.modified_count > 0:
+            logger.info(f"Updated group {group_id} status to {status}")
+        else:
+            logger.warning(f"No group found with group_id {group_id} for status update")
+        return result.modified_count > 0
+    except PyMongoError as e:
+        logger.error(f"Failed to update group {group_id} status to {status}: {e}")
+        return False
+
+def reconcile_group_counters(group_id: str, generation: int):
+    """Write the summed shard total of a group generation to the group and keep its status in step.
+
+    The group turns full once the shards reach its limit and back to active if seats were
+    released. `updated_at` only moves when the status changes, so it still records when
+    the group filled up. Returns the group's card, or None if it moved on or the read failed.
+    Generations that started unsharded are refused, since their seats live on the group
+    document and the shards would read as empty.
+    """
+    db = get_db()
+    total = sum_counter_shards(group_id, generation)
+    if total is None:
+        return None
+    query = {
+        "group_id": group_id,
+        "generation": generation,
+        "status": {"$in": ["active", "full"]},
+        "counter_shards": {"$gt": 1}
+    }
+    try:
+        try:
+            group = db.groups.find_one_and_update(
+                query,
+                [
+                    {"$set": {"_next_status": {"$cond": [{"$gte": [total, "$limit"]}, "full", "active"]}}},
+                    {"$set": {
+                        "current_users": total,
+                        "updated_at": {"$cond": [{"$eq": ["$_next_status", "$status"]}, "$updated_at", datetime.now()]},
+                        "status": "$_next_status"
+                    }},
+                    {"$unset": "_next_status"}
+                ],
+                projection=GROUP_CARD_FIELDS,
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            # Another pool instance took over filling; record the count but stay full
+            group = db.groups.find_one_and_update(
+                query, {"$set": {"current_users": total}},
+                projection=GROUP_CARD_FIELDS, return_document=ReturnDocument.AFTER
+            )
+        if group:
+            group_cache.set(group_id, group)
+        return group
+    except PyMongoError as e:
+        logger.error(f"Failed to reconcile counters of group {group_id}: {e}")
+        return None
+
+def _increment_sharded(group_id: str, generation: int, limit: int, shards: int):
+    counter = reserve_counter_seat(group_id, generation, limit, shards)
+    if not counter:
+        logger.warning(f"No free seat in group {group_id} (generation {generation})")
+        # Every shard is full, so make sure the group is marked full as well
+        reconcile_group_counters(group_id, generation)
+        return False
+    if counter["count"] >= counter["cap"]:
+        # This shard just filled up; only now can the whole group have reached its limit
+        card = reconcile_group_counters(group_id, generation)
+        if card:
+            return card
+    return {"group_id": group_id, "generation": generation, "limit": limit, "status": "active"}
+
+def increment_group_users(group_id: str, generation: int, limit: int = None, shards: int = None):
+    """Atomically reserve a seat in a group generation and mark the group full when it reaches its limit.
+
+    The update only applies while the group is active, still on `generation` and below its
+    limit, so concurrent confirmations can never overfill it or land in a rotated generation.
+    When the generation counts seats in counter shards (see group_counter_shards), the seat
+    comes from a random shard instead of the group document; the group's count and status
+    are then reconciled when a shard fills up and by the background reconciler. Pass the
+    group's `limit` and `shards` to save a read.
+    Returns the group's card after the reservation, or False if no seat was free.
+    """
+    if limit is None or shards is None:
+        group = get_group(group_id)
+        if not group or group.get("generation", 0) != generation:
+            return False
+        limit, shards = group["limit"], group_counter_shards(group)
+    if shards > 1:
+        return _increment_sharded(group_id, generation, limit, shards)
+    db = get_db()
+    try:
+        group = db.groups.find_one_and_update(
+            {
+                "group_id": group_id,
+                "generation": generation,
+                "status": "active",
+                "$expr": {"$lt": ["$current_users", "$limit"]}
+            },
+            [
+                {"$set": {"current_users": {"$add": ["$current_users", 1]}, "updated_at": datetime.now()}},
+                {"$set": {"status": {"$cond": [{"$gte": ["$current_users", "$limit"]}, "full", "$status"]}}}
+            ],
+            projection=GROUP_CARD_FIELDS,
+            return_document=ReturnDocument.AFTER
+        )
+        if not group:
+            logger.warning(f"No free seat in group {group_id} (generation {generation})")
+            return False
+        group_cache.set(group_id, group)
+        logger.info(f"Incremented users for group {group_id} to {group['current_users']}")
+        return group
+    except PyMongoError as e:
+        logger.error(f"Failed to increment users for group {group_id}: {e}")
+        return False
+
+def _release_frozen_seat(group_id: str, generation: int) -> bool:
+    # Unsharded seats of a rotated generation were frozen into last_approved_seats
+    db = get_db()
+    try:
+        result = db.groups.update_one(
+            {"group_id": group_id, "last_approved_generation": generation, "last_approved_seats": {"$gt": 0}},
+            {"$inc": {"last_approved_seats": -1}}
+        )
+        return result.modified_count > 0
+    except PyMongoError as e:
+        logger.error(f"Failed to release a frozen seat in group {group_id} (generation {generation}): {e}")
+        return False
+
+def release_group_seat(group_id: str, generation: int, shards: int = None) -> bool:
+    """Give back a seat reserved with increment_group_users when the submission could not be saved.
+
+    A seat of a generation that was rotated meanwhile is taken off its frozen seat count
+    instead, so its approval does not wait for a row that will never be written.
+    """
+    if shards is None:
+        group = get_group(group_id)
+        if not group:
+            return False
+        if group.get("generation", 0) != generation:
+            if group.get("last_approved_generation") == generation and group.get("last_approved_counter_shards", 1) > 1:
+                return release_counter_seat(group_id, generation)
+            return _release_frozen_seat(group_id, generation)
+        shards = group_counter_shards(group)
+    if shards > 1:
+        released = release_counter_seat(group_id, generation)
+        reconcile_group_counters(group_id, generation)
+        return released
+    db = get_db()
+    try:
+        query = {"group_id": group_id, "generation": generation, "current_users": {"$gt": 0}}
+        try:
+            result = db.groups.update_one(
+                query,
+                [
+                    {"$set": {"current_users": {"$subtract": ["$current_users", 1]}, "updated_at": datetime.now()}},
+                    {"$set": {"status": {"$cond": [{"$eq": ["$status", "full"]}, "active", "$status"]}}}
+                ]
+            )
+        except DuplicateKeyError:
+            # Another pool instance took over filling; give the seat back but stay full
+            result = db.groups.update_one(query, {"$inc": {"current_users": -1}, "$set": {"updated_at": datetime.now()}})
+        group_cache.pop(group_id)
+        if result.modified_count == 0:
+            return _release_frozen_seat(group_id, generation)
+        return True
+    except PyMongoError as e:
+        logger.error(f"Failed to release seat in group {group_id}: {e}")
+        return False
+
+def rotate_group_generation(group_id: str, generation: int):
+    """Atomically move a group from `generation` to a new, empty generation.
+
+    New submissions go into the new generation immediately. The old generation's seat count
+    and shard count are kept as last_approved_seats and last_approved_counter_shards (see
+    get_frozen_seats). Returns the group as it was before the rotation (so callers can work on the frozen old generation), or None if the
+    group was not on `generation` anymore, e.g. because another approval got there first.
+    """
+    db = get_db()
+    try:
+        group = db.groups.find_one({"group_id": group_id, "generation": generation}, {"_id": 0, "counter_shards": 1})
+        if not group:
+            logger.warning(f"Group {group_id} is no longer on generation {generation}, rotation skipped")
+            return None
+        # Seal the sharded counters first, so no seat can be taken in the old generation after it is frozen
+        shards = group_counter_shards(group)
+        if shards > 1 and not seal_counter_shards(group_id, generation, shards):
+            return None
+        previous = None
+        # Reactivate the group unless another pool instance of its limit is already filling;
+        # then it waits on standby until selection promotes it again
+        for status in ("active", "standby"):
+            now = datetime.now()
+            try:
+                previous = db.groups.find_one_and_update(
+                    {"group_id": group_id, "generation": generation},
+                    [{"$set": {
+                        "generation": generation + 1,
+                        # Field paths read the document before this update, so this freezes the old count
+                        "last_approved_seats": "$current_users",
+                        "last_approved_counter_shards": shards,
+                        "current_users": 0,
+                        # The new generation counts seats with the shard count configured now
+                        "counter_shards": GROUP_COUNTER_SHARDS,
+                        "status": status,
+                        "last_approved_generation": generation,
+                        "last_approved_at": now,
+                        "updated_at": now
+                    }}],
+                    return_document=ReturnDocument.BEFORE
+                )
+                break
+            except DuplicateKeyError:
+                continue
+        group_cache.pop(group_id)
+        if previous:
+            logger.info(f"Rotated group {group_id} from generation {generation} to {generation + 1}")
+        else:
+            logger.warning(f"Group {group_id} is no longer on generation {generation}, rotation skipped")
+        return previous
+    except PyMongoError as e:
+        logger.error(f"Failed to rotate group {group_id}: {e}")
+        return None
+
+def get_frozen_seats(group_id: str, generation: int):
+    """Seats reserved in a group's last rotated generation, which its roster must end up with.
+
+    Returns {"seats", "rotated_at"}, with seats None if the generation is not the group's
+    last rotated one or was rotated before seat counts were kept, or None if the read failed.
+    """
+    db = get_db()
+    try:
+        group = db.groups.find_one(
+            {"group_id": group_id, "last_approved_generation": generation},
+            {"_id": 0, "last_approved_seats": 1, "last_approved_counter_shards": 1, "last_approved_at": 1}
+        )
+    except PyMongoError as e:
+        logger.error(f"Failed to read the frozen seats of group {group_id} (generation {generation}): {e}")
+        return None
+    if not group or "last_approved_seats" not in group:
+        return {"seats": None, "rotated_at": None}
+    seats = group["last_approved_seats"]
+    if group.get("last_approved_counter_shards", 1) > 1:
+        # Sealed shards stay authoritative for sharded generations
+        seats = sum_counter_shards(group_id, generation)
+        if seats is None:
+            return None
+    return {"seats": seats, "rotated_at": group.get("last_approved_at")}
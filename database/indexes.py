@@ -0,0 +1,104 @@
+import logging
+from pymongo import ASCENDING
+from pymongo.errors import PyMongoError, OperationFailure
+from config import DELETE_DELAY_HOURS
+from database.retry import TRANSIENT_ERRORS
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+def _ensure_ttl_index(collection, field: str, expire_after_seconds: int):
+    """Create a TTL index on `field`, updating its expiry in place if the setting changed."""
+    name = f"{field}_ttl"
+    try:
+        collection.create_index([(field, ASCENDING)], name=name, expireAfterSeconds=expire_after_seconds)
+    except OperationFailure:
+        collection.database.command(
+            "collMod", collection.name,
+            index={"name": name, "expireAfterSeconds": expire_after_seconds}
+        )
+        logger.info(f"Updated TTL of {collection.name}.{name} to {expire_after_seconds}s")
+
+def _ensure_unique_user_index(db):
+    """Make users.user_id unique so registration can be a single upsert.
+
+    Older deployments have a non-unique index of the same name; it is rebuilt as unique,
+    or kept as is (with a warning) while duplicate user documents still exist.
+    """
+    existing = db.users.index_information().get("user_id")
+    if existing and existing.get("unique"):
+        return
+    if existing:
+        db.users.drop_index("user_id")
+    try:
+        db.users.create_index([("user_id", ASCENDING)], name="user_id", unique=True)
+    except OperationFailure as e:
+        logger.warning(f"Duplicate users prevent a unique user_id index, keeping it non-unique: {e}")
+        db.users.create_index([("user_id", ASCENDING)], name="user_id")
+
+def ensure_indexes(db):
+    """Create the indexes the bot's queries rely on. Safe to run on every startup.
+
+    Every step runs on its own, so one index that cannot be built (say, a unique index
+    over existing duplicates) is logged without skipping the rest. Transient connection
+    errors are raised so the caller can retry; other failures are logged.
+    """
+    steps = [
+        # Groups created before generations and pools existed start on generation 0 as instance 1.
+        # Backfilled first, since the indexes and queries below expect both fields
+        ("groups.generation backfill", lambda: db.groups.update_many({"generation": {"$exists": False}}, {"$set": {"generation": 0}})),
+        ("groups.instance backfill", lambda: db.groups.update_many({"instance": {"$exists": False}}, {"$set": {"instance": 1}})),
+        ("users.user_id", lambda: _ensure_unique_user_index(db)),
+        # Roster of a group generation is a range scan on the (group_id, generation) prefix
+        ("submissions.group_generation_user_unique", lambda: db.submissions.create_index(
+            [("group_id", ASCENDING), ("generation", ASCENDING), ("user_id", ASCENDING)],
+            name="group_generation_user_unique",
+            unique=True
+        )),
+        # One normalized number per group generation, so duplicates are rejected with a single indexed lookup
+        ("submissions.group_generation_number_unique", lambda: db.submissions.create_index(
+            [("group_id", ASCENDING), ("generation", ASCENDING), ("number_key", ASCENDING)],
+            name="group_generation_number_unique",
+            unique=True
+        )),
+        ("submissions.user_id", lambda: db.submissions.create_index([("user_id", ASCENDING)], name="user_id")),
+        ("submissions.retired_at_ttl", lambda: _ensure_ttl_index(db.submissions, "retired_at", DELETE_DELAY_HOURS * 3600)),
+        ("groups.group_id", lambda: db.groups.create_index([("group_id", ASCENDING)], name="group_id", unique=True)),
+        # At most one filling instance per limit, so opening a new pool instance is atomic
+        ("groups.one_active_per_limit", lambda: db.groups.create_index(
+            [("limit", ASCENDING)],
+            name="one_active_per_limit",
+            unique=True,
+            partialFilterExpression={"status": "active"}
+        )),
+        ("groups.limit_status_instance", lambda: db.groups.create_index(
+            [("limit", ASCENDING), ("status", ASCENDING), ("instance", ASCENDING)], name="limit_status_instance"
+        )),
+        ("groups.status_updated_at", lambda: db.groups.create_index(
+            [("status", ASCENDING), ("updated_at", ASCENDING)], name="status_updated_at"
+        )),
+        ("approval_jobs.status_created_at", lambda: db.approval_jobs.create_index(
+            [("status", ASCENDING), ("created_at", ASCENDING)], name="status_created_at"
+        )),
+        # Lets a retried claim find the job an earlier, seemingly failed attempt already claimed
+        ("approval_jobs.claim", lambda: db.approval_jobs.create_index([("claim", ASCENDING)], name="claim", sparse=True)),
+        ("group_counters.group_generation", lambda: db.group_counters.create_index(
+            [("group_id", ASCENDING), ("generation", ASCENDING)], name="group_generation"
+        )),
+        ("group_counters.sealed_at_ttl", lambda: _ensure_ttl_index(db.group_counters, "sealed_at", DELETE_DELAY_HOURS * 3600)),
+        # Expired leases are taken over by the next acquirer; the TTL only keeps the collection small
+        ("locks.expires_at_ttl", lambda: _ensure_ttl_index(db.locks, "expires_at", 3600)),
+    ]
+    failed = []
+    for name, step in steps:
+        try:
+            step()
+        except TRANSIENT_ERRORS:
+            raise
+        except PyMongoError as e:
+            logger.error(f"Failed to ensure MongoDB {name}: {e}")
+            failed.append(name)
+    if failed:
+        logger.warning(f"Ensured MongoDB indexes except {', '.join(failed)}")
+    else:
+        logger.info("Ensured MongoDB indexes")
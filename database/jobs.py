@@ -0,0 +1,170 @@
+import logging
+import uuid
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError
+from datetime import datetime, timedelta
+from database.connection import get_db
+from database.retry import with_retry
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Approval stages, in the order they complete
+STAGES = ("queued", "rotated", "rendered", "uploaded", "notified", "retired")
+
+def approval_job_id(group_id: str, generation: int) -> str:
+    """One job per group generation, so enqueuing the same approval twice is a no-op."""
+    return f"{group_id}:{generation}"
+
+def create_approval_job(group_id: str, generation: int, requested_by: int = None):
+    """Create the approval job for a group generation, or return the existing one."""
+    db = get_db()
+    try:
+        now = datetime.now()
+        # An upsert of insert-only fields, so retrying it cannot change an existing job
+        job = with_retry(
+            db.approval_jobs.find_one_and_update,
+            {"_id": approval_job_id(group_id, generation)},
+            {
+                "$setOnInsert": {
+                    "group_id": group_id,
+                    "generation": generation,
+                    "stage": "queued",
+                    "status": "pending",
+                    "owner": None,
+                    "lease_until": now,
+                    "attempts": 0,
+                    "notified": 0,
+                    "notify_cursor": None,
+                    "requested_by": requested_by,
+                    "created_at": now,
+                    "updated_at": now
+                }
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        logger.info(f"Approval job {job['_id']} is at stage {job['stage']} ({job['status']})")
+        return job
+    except PyMongoError as e:
+        logger.error(f"Failed to create approval job for group {group_id} (generation {generation}): {e}")
+        return None
+
+def get_approval_job(group_id: str, generation: int):
+    """Fetch the approval job for a group generation."""
+    db = get_db()
+    try:
+        return with_retry(db.approval_jobs.find_one, {"_id": approval_job_id(group_id, generation)})
+    except PyMongoError as e:
+        logger.error(f"Failed to fetch approval job for group {group_id} (generation {generation}): {e}")
+        return None
+
+def _claimable(now: datetime) -> dict:
+    # Pending jobs past their retry delay, or running jobs whose owner's lease has expired (e.g. the process died)
+    return {"status": {"$in": ["pending", "running"]}, "lease_until": {"$lte": now}}
+
+def reset_approval_job(job_id: str):
+    """Make a failed job, or a pending one still backing off, claimable now with a fresh attempt budget.
+
+    Used when an admin explicitly resumes an approval. Jobs running under a live lease are
+    left alone. Returns the job after the reset, or None if there was nothing to reset.
+    """
+    db = get_db()
+    try:
+        now = datetime.now()
+        job = db.approval_jobs.find_one_and_update(
+            {"_id": job_id, "$or": [{"status": "failed"}, {"status": "pending", "lease_until": {"$gt": now}}]},
+            {"$set": {"status": "pending", "owner": None, "lease_until": now, "attempts": 0, "updated_at": now}},
+            return_document=ReturnDocument.AFTER
+        )
+        if job:
+            logger.info(f"Reset approval job {job_id} for a manual resume")
+        return job
+    except PyMongoError as e:
+        logger.error(f"Failed to reset approval job {job_id}: {e}")
+        return None
+
+def _claim(query: dict, owner: str, lease_seconds: int, **kwargs):
+    """Atomically move the first claimable job matching `query` to running under `owner`.
+
+    Each claim carries a fresh token, so when a transient error hides a claim that did
+    apply, the retry returns that job by its token instead of leaving it leased to no one.
+    """
+    db = get_db()
+    token = uuid.uuid4().hex
+    retried = False
+
+    def attempt():
+        nonlocal retried
+        if retried:
+            claimed = db.approval_jobs.find_one({"claim": token})
+            if claimed:
+                return claimed
+        retried = True
+        now = datetime.now()
+        return db.approval_jobs.find_one_and_update(
+            {**query, **_claimable(now)},
+            {
+                "$set": {
+                    "status": "running",
+                    "owner": owner,
+                    "claim": token,
+                    "lease_until": now + timedelta(seconds=lease_seconds),
+                    "updated_at": now
+                },
+                "$inc": {"attempts": 1}
+            },
+            return_document=ReturnDocument.AFTER,
+            **kwargs
+        )
+
+    return with_retry(attempt)
+
+def claim_approval_job(job_id: str, owner: str, lease_seconds: int):
+    """Atomically claim a specific job for `owner`. Returns the job, or None if someone else holds it."""
+    try:
+        return _claim({"_id": job_id}, owner, lease_seconds)
+    except PyMongoError as e:
+        logger.error(f"Failed to claim approval job {job_id}: {e}")
+        return None
+
+def claim_next_approval_job(owner: str, lease_seconds: int):
+    """Atomically claim the oldest claimable job for `owner`, or return None."""
+    try:
+        return _claim({}, owner, lease_seconds, sort=[("created_at", 1)])
+    except PyMongoError as e:
+        logger.error(f"Failed to claim next approval job: {e}")
+        return None
+
+def checkpoint_approval_job(job_id: str, owner: str, lease_seconds: int, **fields) -> bool:
+    """Persist stage progress and renew the lease. Returns False if `owner` no longer holds the job."""
+    db = get_db()
+    try:
+        now = datetime.now()
+        fields.update({"lease_until": now + timedelta(seconds=lease_seconds), "updated_at": now})
+        # Conditional on ownership and idempotent, so it is safe to retry
+        result = with_retry(db.approval_jobs.update_one, {"_id": job_id, "owner": owner, "status": "running"}, {"$set": fields})
+        return result.matched_count > 0
+    except PyMongoError as e:
+        logger.error(f"Failed to checkpoint approval job {job_id}: {e}")
+        return False
+
+def release_approval_job(job_id: str, owner: str, status: str, error: str = None, retry_after: float = 0) -> bool:
+    """Release a job as done, failed, or pending again (claimable by any worker after `retry_after` seconds)."""
+    db = get_db()
+    try:
+        now = datetime.now()
+        result = db.approval_jobs.update_one(
+            {"_id": job_id, "owner": owner},
+            {"$set": {
+                "status": status,
+                "owner": None,
+                "lease_until": now + timedelta(seconds=retry_after),
+                "error": error,
+                "updated_at": now
+            }}
+        )
+        return result.modified_count > 0
+    except PyMongoError as e:
+        logger.error(f"Failed to release approval job {job_id} as {status}: {e}")
+        return False
@@ -0,0 +1,45 @@
+import logging
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError, DuplicateKeyError
+from datetime import datetime, timedelta
+from database.connection import get_db
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+def acquire_lock(name: str, owner: str, lease_seconds: int) -> bool:
+    """Acquire or renew the lease lock `name` for `owner`.
+
+    Succeeds when the lock is free, expired, or already held by `owner` (which extends
+    the lease). Returns False while another owner holds an unexpired lease, and None if
+    Mongo could not be asked (the lease may still be ours).
+    """
+    db = get_db()
+    try:
+        now = datetime.now()
+        lock = db.locks.find_one_and_update(
+            {"_id": name, "$or": [{"owner": owner}, {"expires_at": {"$lt": now}}]},
+            {
+                "$set": {"owner": owner, "expires_at": now + timedelta(seconds=lease_seconds)},
+                "$setOnInsert": {"created_at": now}
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return lock is not None
+    except DuplicateKeyError:
+        # The lock exists and is held by someone else, so the upsert collided on _id
+        return False
+    except PyMongoError as e:
+        logger.error(f"Failed to acquire lock {name} for {owner}: {e}")
+        return None
+
+def release_lock(name: str, owner: str) -> bool:
+    """Release the lock `name` if `owner` still holds it."""
+    db = get_db()
+    try:
+        result = db.locks.delete_one({"_id": name, "owner": owner})
+        return result.deleted_count > 0
+    except PyMongoError as e:
+        logger.error(f"Failed to release lock {name} for {owner}: {e}")
+        return False
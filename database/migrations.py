@@ -0,0 +1,133 @@
+import logging
+from pymongo import UpdateOne
+from pymongo.errors import PyMongoError, BulkWriteError
+from datetime import datetime
+from config import GROUP_COUNTER_SHARDS
+from utils.phone import normalize_number
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Submission fields that older versions kept on the user document
+LEGACY_SUBMISSION_FIELDS = ("name", "number", "group_id")
+
+# Legacy users copied per bulk write
+BACKFILL_BATCH_SIZE = 500
+
+def _legacy_row(user: dict, generation: int) -> dict:
+    # Older versions stored numbers as typed; keep the raw number if it does not normalize,
+    # so the user still ends up in the group's VCF
+    number = normalize_number(user["number"]) or str(user["number"]).strip()
+    return {
+        "user_id": user["user_id"],
+        "group_id": user["group_id"],
+        "generation": generation,
+        "name": user.get("name") or "",
+        "number": number,
+        "number_key": number,
+        "created_at": user.get("updated_at") or datetime.now()
+    }
+
+def _backfill_batch(db, users: list, generations: dict) -> int:
+    """Copy one batch of legacy users into submissions and strip the legacy fields of the copied ones."""
+    requests = []
+    for user in users:
+        row = _legacy_row(user, generations[user["group_id"]])
+        key = {"group_id": row["group_id"], "generation": row["generation"], "user_id": row["user_id"]}
+        requests.append(UpdateOne(key, {"$setOnInsert": row}, upsert=True))
+
+    failed = set()
+    try:
+        db.submissions.bulk_write(requests, ordered=False)
+    except BulkWriteError as e:
+        for error in e.details.get("writeErrors", []):
+            user = users[error["index"]]
+            failed.add(user["_id"])
+            logger.warning(
+                f"Could not migrate the submission of user {user['user_id']} to group {user['group_id']}, "
+                f"keeping it on the user document: {error.get('errmsg')}"
+            )
+
+    migrated = [user["_id"] for user in users if user["_id"] not in failed]
+    if migrated:
+        db.users.update_many(
+            {"_id": {"$in": migrated}},
+            {"$unset": {field: "" for field in LEGACY_SUBMISSION_FIELDS}}
+        )
+    return len(migrated)
+
+def migrate_legacy_submissions(db) -> int:
+    """Move submissions still stored on user documents into the submissions collection.
+
+    Older versions kept a user's single submission (name, number, group_id) on their user
+    document and deleted it on approval, so any such document belongs to a group that has
+    not been approved yet. Each one is copied into the group's current generation with a
+    normalized number key, then the legacy fields are removed. Rows that conflict with an
+    existing submission (e.g. a duplicate number) stay on the user document and are logged.
+    Safe to run on every startup: copies are upserts and migrated users no longer match.
+    Returns the number of migrated submissions.
+    """
+    query = {"group_id": {"$exists": True}, "number": {"$exists": True}}
+    try:
+        if db.users.find_one(query, {"_id": 1}) is None:
+            return 0
+        generations = {}  # Format: {group_id: generation}
+        migrated = skipped = 0
+        batch = []
+        for user in db.users.find(query, {"_id": 1, "user_id": 1, "name": 1, "number": 1, "group_id": 1, "updated_at": 1}):
+            group_id = user["group_id"]
+            if group_id not in generations:
+                group = db.groups.find_one({"group_id": group_id}, {"_id": 0, "generation": 1})
+                generations[group_id] = group.get("generation", 0) if group else None
+            if generations[group_id] is None:
+                skipped += 1
+                logger.warning(f"User {user['user_id']} submitted to unknown group {group_id}, leaving it unmigrated")
+                continue
+            batch.append(user)
+            if len(batch) >= BACKFILL_BATCH_SIZE:
+                migrated += _backfill_batch(db, batch, generations)
+                batch = []
+        if batch:
+            migrated += _backfill_batch(db, batch, generations)
+        logger.info(f"Migrated {migrated} legacy submissions into the submissions collection ({skipped} skipped)")
+        return migrated
+    except PyMongoError as e:
+        logger.error(f"Failed to migrate legacy submissions: {e}")
+        return 0
+
+def stamp_counter_shards(db) -> int:
+    """Record the seat counter shard count on groups from before it was tracked per generation.
+
+    A generation without counter documents was counted on the group document and is
+    stamped as unsharded. One with counter documents keeps the configured shard count, or,
+    if sharding has been switched off since, the highest shard seen (shards are created on
+    first use, so this can undercount; such groups are logged). Returns the number of
+    stamped groups.
+    """
+    try:
+        stamped = 0
+        for group in db.groups.find({"counter_shards": {"$exists": False}}, {"_id": 1, "group_id": 1, "generation": 1}):
+            generation = group.get("generation", 0)
+            highest = db.group_counters.find_one(
+                {"group_id": group["group_id"], "generation": generation},
+                {"_id": 0, "shard": 1},
+                sort=[("shard", -1)]
+            )
+            if highest is None:
+                shards = 1
+            elif GROUP_COUNTER_SHARDS > 1:
+                shards = GROUP_COUNTER_SHARDS
+            else:
+                shards = highest["shard"] + 1
+                logger.warning(f"Group {group['group_id']} is mid-generation on counter shards; assuming {shards} shards until it rotates")
+            result = db.groups.update_one(
+                {"_id": group["_id"], "counter_shards": {"$exists": False}},
+                {"$set": {"counter_shards": shards}}
+            )
+            stamped += result.modified_count
+        if stamped:
+            logger.info(f"Stamped the counter shard count of {stamped} groups")
+        return stamped
+    except PyMongoError as e:
+        logger.error(f"Failed to stamp counter shard counts: {e}")
+        return 0
@@ -0,0 +1,32 @@
+import logging
+import random
+import time
+from pymongo.errors import AutoReconnect, ConnectionFailure, NetworkTimeout
+from config import MONGO_RETRY_BACKOFF
+from utils import metrics
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Errors worth retrying: the server or network was briefly unavailable (includes ServerSelectionTimeoutError)
+TRANSIENT_ERRORS = (AutoReconnect, ConnectionFailure, NetworkTimeout)
+
+def with_retry(operation, *args, retries: int = 3, **kwargs):
+    """Call `operation`, retrying transient connection errors with jittered exponential backoff.
+
+    Only use this for idempotent operations: reads, and updates whose filter stops them
+    from applying twice. The driver's own retryable reads/writes cover a single retry,
+    this covers longer blips such as a replica set election. It sleeps between attempts,
+    so only call it at startup or from worker threads (asyncio.to_thread), never from
+    handlers on the event loop.
+    """
+    for attempt in range(retries + 1):
+        try:
+            return operation(*args, **kwargs)
+        except TRANSIENT_ERRORS as e:
+            if attempt >= retries:
+                raise
+            delay = MONGO_RETRY_BACKOFF * 2 ** attempt * random.uniform(0.5, 1.5)
+            logger.warning(f"Transient MongoDB error (attempt {attempt + 1}/{retries + 1}), retrying in {delay:.1f}s: {e}")
+            metrics.inc("mongo_retries_total")
+            time.sleep(delay)
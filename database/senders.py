@@ -0,0 +1,59 @@
+import logging
+from pymongo.errors import PyMongoError
+from datetime import datetime
+from database.connection import get_db
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Format: {"_id": user_id, "senders": [sender bot id], "updated_at": datetime}
+
+def mark_sender_reachable(sender_id: int, user_id: int) -> bool:
+    """Record that a sender bot can message a user (the user started it)."""
+    db = get_db()
+    try:
+        db.sender_reach.update_one(
+            {"_id": user_id},
+            {"$addToSet": {"senders": sender_id}, "$set": {"updated_at": datetime.now()}},
+            upsert=True
+        )
+        logger.debug(f"Sender {sender_id} can reach user {user_id}")
+        return True
+    except PyMongoError as e:
+        logger.error(f"Failed to record that sender {sender_id} can reach user {user_id}: {e}")
+        return False
+
+def mark_sender_unreachable(sender_id: int, user_id: int) -> bool:
+    """Record that a sender bot can no longer message a user (blocked, or its session lost the peer)."""
+    db = get_db()
+    try:
+        db.sender_reach.update_one(
+            {"_id": user_id, "senders": sender_id},
+            {"$pull": {"senders": sender_id}, "$set": {"updated_at": datetime.now()}}
+        )
+        logger.debug(f"Sender {sender_id} can no longer reach user {user_id}")
+        return True
+    except PyMongoError as e:
+        logger.error(f"Failed to record that sender {sender_id} cannot reach user {user_id}: {e}")
+        return False
+
+def get_reachable_senders(user_ids: list) -> dict:
+    """The sender bot ids that can message each user, as {user_id: set}; users no sender reaches are omitted."""
+    db = get_db()
+    try:
+        return {
+            doc["_id"]: set(doc["senders"])
+            for doc in db.sender_reach.find({"_id": {"$in": list(user_ids)}, "senders.0": {"$exists": True}})
+        }
+    except PyMongoError as e:
+        logger.error(f"Failed to get reachable senders for {len(user_ids)} users: {e}")
+        return {}
+
+def count_reachable_users() -> int:
+    """Number of users at least one sender bot can message."""
+    db = get_db()
+    try:
+        return db.sender_reach.count_documents({"senders.0": {"$exists": True}})
+    except PyMongoError as e:
+        logger.error(f"Failed to count users reachable by sender bots: {e}")
+        return 0
@@ -0,0 +1,179 @@
+import logging
+from pymongo.errors import PyMongoError, DuplicateKeyError
+from datetime import datetime
+from config import USER_SUBMISSIONS_CACHE_SIZE, USER_SUBMISSIONS_CACHE_TTL
+from database.connection import get_db
+from database.groups import GROUP_CARD_FIELDS, group_cache
+from database.retry import with_retry
+from utils.cache import LRUCache
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Groups each user has submitted to; dropped on the user's next submission
+user_groups_cache = LRUCache(USER_SUBMISSIONS_CACHE_SIZE, ttl=USER_SUBMISSIONS_CACHE_TTL, name="user_submissions")  # Format: {user_id: [{"group_id": str, "generation": int}]}
+
+def add_submission(user_id: int, name: str, number: str, group_id: str, generation: int) -> bool:
+    """Add a user's submission to the given group generation.
+
+    `number` must already be normalized to E.164; it doubles as the duplicate-detection key.
+    Returns False if the user or the number is already in this generation.
+    """
+    db = get_db()
+    try:
+        result = db.submissions.insert_one({
+            "user_id": user_id,
+            "group_id": group_id,
+            "generation": generation,
+            "name": name,
+            "number": number,
+            "number_key": number,
+            "created_at": datetime.now()
+        })
+        user_groups_cache.pop(user_id)
+        logger.info(f"Added submission for user {user_id} to group {group_id} (generation {generation})")
+        return result.inserted_id is not None
+    except DuplicateKeyError:
+        logger.warning(f"User {user_id} or number {number} already in group {group_id} (generation {generation})")
+        return False
+    except PyMongoError as e:
+        logger.error(f"Failed to add submission for user {user_id} to group {group_id}: {e}")
+        return False
+
+def count_group_submissions(group_id: str, generation: int):
+    """Number of rows saved in a group generation, or None if the count failed."""
+    db = get_db()
+    try:
+        return db.submissions.count_documents({"group_id": group_id, "generation": generation})
+    except PyMongoError as e:
+        logger.error(f"Failed to count submissions of group {group_id} (generation {generation}): {e}")
+        return None
+
+def has_user_submitted(group_id: str, generation: int, user_id: int) -> bool:
+    """Check whether a user already has a submission in a group generation."""
+    db = get_db()
+    try:
+        query = {"group_id": group_id, "generation": generation, "user_id": user_id}
+        return db.submissions.find_one(query, {"_id": 1}) is not None
+    except PyMongoError as e:
+        logger.error(f"Failed to check submission of user {user_id} in group {group_id}: {e}")
+        return False
+
+def is_number_submitted(group_id: str, generation: int, number_key: str, exclude_user_id: int = None) -> bool:
+    """Check whether a normalized number is already in a group generation (single indexed lookup)."""
+    db = get_db()
+    try:
+        query = {"group_id": group_id, "generation": generation, "number_key": number_key}
+        if exclude_user_id is not None:
+            query["user_id"] = {"$ne": exclude_user_id}
+        return db.submissions.find_one(query, {"_id": 1}) is not None
+    except PyMongoError as e:
+        logger.error(f"Failed to check number {number_key} in group {group_id}: {e}")
+        return False
+
+def find_submission_conflict(group_id: str, generation: int, user_id: int, number_key: str):
+    """Return "user" or "number" if either is already in the group generation, else None (one query)."""
+    db = get_db()
+    try:
+        existing = db.submissions.find_one(
+            {"group_id": group_id, "generation": generation, "$or": [{"user_id": user_id}, {"number_key": number_key}]},
+            {"_id": 0, "user_id": 1}
+        )
+        if not existing:
+            return None
+        return "user" if existing["user_id"] == user_id else "number"
+    except PyMongoError as e:
+        logger.error(f"Failed to check submission conflicts of user {user_id} in group {group_id}: {e}")
+        return None
+
+def get_group_submissions(group_id: str, generation: int, after_user_id: int = None):
+    """Fetch the roster of a group generation, ordered by user_id, with one indexed range scan.
+
+    `after_user_id` resumes the scan after a previously processed user.
+    """
+    db = get_db()
+    try:
+        query = {"group_id": group_id, "generation": generation}
+        if after_user_id is not None:
+            query["user_id"] = {"$gt": after_user_id}
+        # Iterated inside the retry, so a cursor that fails mid-roster is re-read from the start
+        return with_retry(lambda: list(db.submissions.find(
+            query,
+            {"_id": 0, "user_id": 1, "name": 1, "number": 1}
+        ).sort("user_id", 1)))
+    except PyMongoError as e:
+        logger.error(f"Failed to fetch submissions for group {group_id} (generation {generation}): {e}")
+        return []
+
+def retire_generation(group_id: str, generation: int) -> int:
+    """Stamp a rotated generation's submissions so the TTL index purges them after DELETE_DELAY_HOURS."""
+    db = get_db()
+    try:
+        result = db.submissions.update_many(
+            {"group_id": group_id, "generation": generation, "retired_at": {"$exists": False}},
+            {"$set": {"retired_at": datetime.now()}}
+        )
+        logger.info(f"Retired {result.modified_count} submissions of group {group_id} (generation {generation})")
+        return result.modified_count
+    except PyMongoError as e:
+        logger.error(f"Failed to retire submissions of group {group_id} (generation {generation}): {e}")
+        return 0
+
+def _submission_card(submission: dict, group: dict) -> dict:
+    # Submissions from an earlier generation belong to a group that has already been approved
+    approved = submission["generation"] < group.get("generation", 0)
+    return {
+        "group_id": group["group_id"],
+        "limit": group["limit"],
+        "status": "approved" if approved else group["status"],
+        "current_users": group["limit"] if approved else group["current_users"]
+    }
+
+def get_user_submissions(user_id: int):
+    """Fetch all groups a user has submitted to, including group details.
+
+    Served from memory when both the user's memberships and their groups are cached;
+    otherwise one aggregation joins the submissions with their groups and warms both caches.
+    """
+    memberships = user_groups_cache.get(user_id)
+    if memberships is not None:
+        groups = [group_cache.get(membership["group_id"]) for membership in memberships]
+        if all(group is not None for group in groups):
+            return [_submission_card(membership, group) for membership, group in zip(memberships, groups)]
+
+    db = get_db()
+    try:
+        rows = list(db.submissions.aggregate([
+            {"$match": {"user_id": user_id}},
+            {"$project": {"_id": 0, "group_id": 1, "generation": 1}},
+            {"$lookup": {
+                "from": "groups",
+                "let": {"group_id": "$group_id"},
+                "pipeline": [
+                    {"$match": {"$expr": {"$eq": ["$group_id", "$$group_id"]}}},
+                    {"$project": GROUP_CARD_FIELDS}
+                ],
+                "as": "group"
+            }},
+            {"$unwind": "$group"}
+        ]))
+        user_groups_cache.set(user_id, [{"group_id": row["group_id"], "generation": row["generation"]} for row in rows])
+        for row in rows:
+            group_cache.set(row["group_id"], row["group"])
+        if not rows:
+            logger.info(f"No submissions found for user {user_id}")
+            return []
+        logger.info(f"Fetched {len(rows)} submissions for user {user_id}")
+        return [_submission_card(row, row["group"]) for row in rows]
+    except PyMongoError as e:
+        logger.error(f"Failed to fetch submissions for user {user_id}: {e}")
+        return []
+
+def total_submitters_count() -> int:
+    """Count the distinct users with at least one submission."""
+    db = get_db()
+    try:
+        return len(db.submissions.distinct("user_id"))
+    except PyMongoError as e:
+        logger.error(f"Failed to count submitters: {e}")
+        return 0
@@ -1,2 +1,2 @@
-# handlers/__init__.py
+# handlers/__init__.py
 # Package initializer for handlers
\ No newline at end of file
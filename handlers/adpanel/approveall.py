@@ -0,0 +1,107 @@
+import logging
+import asyncio
+import time
+from pyrogram import Client, filters
+from config import ADMIN_IDS, APPROVE_ALL_CONCURRENCY, APPROVE_SEND_RATE
+from database.groups import get_groups_by_status
+from utils.approval import get_group_lock
+from utils.auto_approve import approve_with_retry, format_approval_summary
+from utils.ratelimit import AsyncTokenBucket
+from utils.locks import LockBusy, LeaseLost
+from utils.senders import sender_pool
+from utils.ui import BACK_HOME_MARKUP
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Minimum seconds between edits of the progress message
+PROGRESS_EDIT_INTERVAL = 3
+
+def _render_progress(states: dict) -> str:
+    """Render one line per group from {group_id: result-or-state}."""
+    done = sum(1 for state in states.values() if isinstance(state, dict))
+    lines = [f"⏳ Approving {len(states)} groups ({done}/{len(states)} done)", ""]
+    for group_id, state in states.items():
+        if state == "pending":
+            lines.append(f"🕒 {group_id}: queued")
+        elif state == "running":
+            lines.append(f"🔄 {group_id}: running")
+        elif "error" in state:
+            lines.append(f"❌ {group_id}: {state['error']}")
+        else:
+            lines.append(f"✅ {group_id}: {state['notified']}/{state['total']} notified")
+    return "\n".join(lines)
+
+@Client.on_message(filters.command("approveall") & filters.user(ADMIN_IDS) & filters.private)
+async def handle_approve_all(client: Client, message):
+    """Approve every full group (optionally filtered by limit or status) with bounded parallelism."""
+    admin_id = message.from_user.id
+    logger.debug(f"Handling /approveall for admin {admin_id}")
+
+    # Optional filter: a numeric limit and/or a status (full by default)
+    limit = None
+    status = "full"
+    for arg in message.command[1:]:
+        if arg.isdigit():
+            limit = int(arg)
+        elif arg.lower() in ("full", "active"):
+            status = arg.lower()
+        else:
+            await message.reply_text(
+                "❌ Usage: /approveall [limit] [full|active]\nExample: /approveall 100",
+                reply_markup=BACK_HOME_MARKUP
+            )
+            logger.info(f"Invalid /approveall command by admin {admin_id}: {message.text}")
+            return
+
+    try:
+        groups = await asyncio.to_thread(get_groups_by_status, status, limit)
+        if not groups:
+            await message.reply_text(f"No {status} groups to approve.")
+            logger.info(f"No {status} groups for /approveall by admin {admin_id}")
+            return
+
+        states = {group["group_id"]: "pending" for group in groups}
+        progress = await message.reply_text(_render_progress(states))
+        semaphore = asyncio.Semaphore(APPROVE_ALL_CONCURRENCY)
+        # All groups share one Telegram send-rate budget, scaled by the sender bots' usable reach
+        rate_limiter = AsyncTokenBucket(APPROVE_SEND_RATE * await sender_pool.capacity())
+        last_edit = time.monotonic()
+
+        async def refresh(force: bool = False):
+            nonlocal last_edit
+            if not force and time.monotonic() - last_edit < PROGRESS_EDIT_INTERVAL:
+                return
+            last_edit = time.monotonic()
+            try:
+                await progress.edit_text(_render_progress(states))
+            except Exception as e:
+                logger.debug(f"Failed to update /approveall progress: {e}")
+
+        async def process(group_id: str):
+            async with semaphore:
+                lock = get_group_lock(group_id)
+                if lock.locked():
+                    states[group_id] = {"group_id": group_id, "error": "already being approved"}
+                    return
+                try:
+                    async with lock:
+                        states[group_id] = "running"
+                        await refresh()
+                        states[group_id] = await approve_with_retry(client, group_id, rate_limiter=rate_limiter)
+                except LeaseLost:
+                    states[group_id] = {"group_id": group_id, "error": "lost its approval lock, a worker will resume it"}
+                except LockBusy:
+                    states[group_id] = {"group_id": group_id, "error": "already being approved by another worker"}
+                await refresh()
+
+        await asyncio.gather(*(process(group_id) for group_id in states))
+
+        await progress.edit_text(
+            format_approval_summary("✅ /approveall Completed", list(states.values())),
+            reply_markup=BACK_HOME_MARKUP
+        )
+        logger.info(f"Admin {admin_id} approved {len(states)} {status} groups via /approveall")
+    except Exception as e:
+        await message.reply_text("❌ Error approving groups. Please try again.")
+        logger.error(f"Error in /approveall for admin {admin_id}: {e}", exc_info=True)
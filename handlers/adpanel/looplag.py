@@ -0,0 +1,41 @@
+import logging
+from datetime import datetime
+from pyrogram import Client, filters
+from config import ADMIN_IDS
+from utils.looplag import loop_monitor
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+@Client.on_message(filters.command("looplag") & filters.user(ADMIN_IDS) & filters.private)
+async def handle_looplag(client: Client, message):
+    """Report event-loop lag and the handlers that blocked the loop most often."""
+    logger.debug(f"Handling /looplag for admin {message.from_user.id}")
+    try:
+        lines = [
+            "🩺 **Event Loop Lag**",
+            f"Last: {loop_monitor.last_lag * 1000:.0f} ms | Max: {loop_monitor.max_lag * 1000:.0f} ms",
+            f"Stall threshold: {loop_monitor.threshold * 1000:.0f} ms",
+            ""
+        ]
+        if loop_monitor.incidents:
+            lines.append("**Blocking incidents by handler:**")
+            for handler, count in loop_monitor.incidents.most_common(10):
+                lines.append(f"• `{handler}`: {count}")
+        else:
+            lines.append("No blocking incidents recorded. ✅")
+
+        if loop_monitor.recent:
+            incident = loop_monitor.recent[-1]
+            seen = datetime.fromtimestamp(incident["time"]).strftime("%Y-%m-%d %H:%M:%S")
+            lines += [
+                "",
+                f"**Latest:** {seen}, {incident['stalled']:.2f}s+ at `{incident['blocking']}`",
+                f"```\n{incident['stack'][-2500:]}```"
+            ]
+
+        await message.reply_text("\n".join(lines))
+        logger.info(f"Sent loop lag report to admin {message.from_user.id}")
+    except Exception as e:
+        await message.reply_text("❌ Error building the loop lag report.")
+        logger.error(f"Error handling /looplag for admin {message.from_user.id}: {e}", exc_info=True)
@@ -0,0 +1,123 @@
+import logging
+import asyncio
+import cProfile
+import io
+import marshal
+import pstats
+import tracemalloc
+from datetime import datetime
+from pyrogram import Client, filters
+from config import ADMIN_IDS, PROFILE_MAX_SECONDS
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+DEFAULT_SECONDS = 30
+REPORT_LINES = 25
+
+# Only one profiler can hook the interpreter at a time
+_profile_lock = asyncio.Lock()
+
+def _window(message) -> int:
+    """Seconds requested in "/command <seconds>", clamped to 1..PROFILE_MAX_SECONDS."""
+    parts = message.text.split()
+    seconds = int(parts[1]) if len(parts) > 1 else DEFAULT_SECONDS
+    return max(1, min(seconds, PROFILE_MAX_SECONDS))
+
+def _truncate(report: str, limit: int = 3500) -> str:
+    return report if len(report) <= limit else report[:limit] + "\n..."
+
+def _allocation_stats(baseline, snapshot):
+    """Top allocation sites in `snapshot` and their growth since `baseline`, by line."""
+    ignore = [
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ]
+    snapshot = snapshot.filter_traces(ignore)
+    return snapshot.statistics("lineno"), snapshot.compare_to(baseline.filter_traces(ignore), "lineno")
+
+@Client.on_message(filters.command("profile") & filters.user(ADMIN_IDS) & filters.private)
+async def handle_profile(client: Client, message):
+    """Profile the live event loop for a window and send a report plus the raw .pstats file."""
+    admin_id = message.from_user.id
+    try:
+        seconds = _window(message)
+    except ValueError:
+        await message.reply_text("Usage: /profile <seconds>")
+        return
+    if _profile_lock.locked():
+        await message.reply_text("⏳ A profile is already running. Please wait for it to finish.")
+        return
+
+    async with _profile_lock:
+        try:
+            await message.reply_text(f"🔬 Profiling the bot for {seconds}s...")
+            logger.info(f"Admin {admin_id} started a {seconds}s profile")
+
+            # Every handler and task runs on the loop thread, so profiling it while we sleep captures them all
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                await asyncio.sleep(seconds)
+            finally:
+                profiler.disable()
+
+            stats = pstats.Stats(profiler)
+            raw = marshal.dumps(stats.stats)  # Same format as Stats.dump_stats()
+            report = io.StringIO()
+            stats.stream = report
+            stats.strip_dirs().sort_stats("cumulative").print_stats(REPORT_LINES)
+
+            await message.reply_text(f"```\n{_truncate(report.getvalue().strip())}\n```")
+            stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            await message.reply_document(
+                document=io.BytesIO(raw),
+                file_name=f"profile_{stamp}.pstats",
+                caption=f"Full {seconds}s profile. Open with `python -m pstats profile_{stamp}.pstats` or snakeviz."
+            )
+            logger.info(f"Sent {seconds}s profile to admin {admin_id}")
+        except Exception as e:
+            await message.reply_text("❌ Error while profiling. Please try again.")
+            logger.error(f"Error profiling for admin {admin_id}: {e}", exc_info=True)
+
+@Client.on_message(filters.command("memprofile") & filters.user(ADMIN_IDS) & filters.private)
+async def handle_memprofile(client: Client, message):
+    """Trace allocations for a window and send the top allocation sites and their growth."""
+    admin_id = message.from_user.id
+    try:
+        seconds = _window(message)
+    except ValueError:
+        await message.reply_text("Usage: /memprofile <seconds>")
+        return
+    if _profile_lock.locked():
+        await message.reply_text("⏳ A profile is already running. Please wait for it to finish.")
+        return
+
+    async with _profile_lock:
+        # Leave tracing on afterwards if it was enabled at startup (PYTHONTRACEMALLOC)
+        was_tracing = tracemalloc.is_tracing()
+        try:
+            await message.reply_text(f"🧠 Tracing allocations for {seconds}s...")
+            logger.info(f"Admin {admin_id} started a {seconds}s memory profile")
+            if not was_tracing:
+                tracemalloc.start(10)
+            baseline = await asyncio.to_thread(tracemalloc.take_snapshot)
+            await asyncio.sleep(seconds)
+            snapshot = await asyncio.to_thread(tracemalloc.take_snapshot)
+
+            top, growth = await asyncio.to_thread(_allocation_stats, baseline, snapshot)
+            current, peak = tracemalloc.get_traced_memory()
+
+            lines = [f"Traced memory: {current / 1024 / 1024:.1f} MB (peak {peak / 1024 / 1024:.1f} MB)", "", "Top allocations:"]
+            lines += [str(stat) for stat in top[:10]]
+            lines += ["", f"Growth over {seconds}s:"]
+            lines += [str(stat) for stat in growth[:10]]
+            report = "\n".join(lines)
+            await message.reply_text(f"```\n{_truncate(report)}\n```")
+            logger.info(f"Sent memory profile to admin {admin_id}")
+        except Exception as e:
+            await message.reply_text("❌ Error while tracing memory. Please try again.")
+            logger.error(f"Error tracing memory for admin {admin_id}: {e}", exc_info=True)
+        finally:
+            if not was_tracing:
+                tracemalloc.stop()
@@ -0,0 +1,36 @@
+import logging
+from pyrogram import Client, filters
+from config import ADMIN_IDS
+from utils import metrics
+from utils.flood import flood_guard
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Group -1 runs before every plugin handler; throttled updates stop here
+
+@Client.on_message(filters.private & ~filters.user(ADMIN_IDS), group=-1)
+async def guard_messages(client: Client, message):
+    """Drop messages from users over their rate, replying "slow down" at most once per interval."""
+    if not message.from_user or flood_guard.allow(message.from_user.id):
+        return
+    metrics.inc("flood_dropped_total", kind="message")
+    if flood_guard.should_notify(message.from_user.id):
+        logger.info(f"Throttling messages from user {message.from_user.id}")
+        try:
+            await message.reply_text("⏳ You're sending messages too fast. Please slow down.")
+        except Exception as e:
+            logger.debug(f"Failed to send slow-down notice to user {message.from_user.id}: {e}")
+    message.stop_propagation()
+
+@Client.on_callback_query(~filters.user(ADMIN_IDS), group=-1)
+async def guard_callbacks(client: Client, callback_query):
+    """Drop button taps from users over their rate with a cheap callback answer."""
+    if flood_guard.allow(callback_query.from_user.id):
+        return
+    metrics.inc("flood_dropped_total", kind="callback")
+    try:
+        await callback_query.answer("⏳ Slow down, please try again in a moment.")
+    except Exception as e:
+        logger.debug(f"Failed to answer throttled callback from user {callback_query.from_user.id}: {e}")
+    callback_query.stop_propagation()
@@ -0,0 +1,20 @@
+import logging
+from pyrogram import Client, filters
+from utils.recorder import update_recorder
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Group -2 sees every update before flood protection and the real handlers
+
+@Client.on_message(filters.private, group=-2)
+async def record_message(client: Client, message):
+    """Record incoming private messages when RECORD_UPDATES is on."""
+    if update_recorder.enabled and message.from_user:
+        update_recorder.record("message", message.from_user.id, text=message.text or message.caption or "")
+
+@Client.on_callback_query(group=-2)
+async def record_callback(client: Client, callback_query):
+    """Record button taps when RECORD_UPDATES is on."""
+    if update_recorder.enabled:
+        update_recorder.record("callback", callback_query.from_user.id, data=callback_query.data or "")
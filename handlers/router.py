@@ -0,0 +1,37 @@
+import logging
+from pyrogram import Client
+from config import ADMIN_IDS
+from utils import metrics, tracing
+from utils.flood import flood_guard
+from utils.router import callback_router
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+@Client.on_callback_query()
+async def route_callback_query(client: Client, callback_query):
+    """Single entry point for every button tap; dispatches through the callback router."""
+    route, args = callback_router.resolve(callback_query.data or "")
+    if route is None:
+        await callback_query.answer("This button is no longer valid. Please send /start.")
+        logger.warning(f"Unrouted callback data from user {callback_query.from_user.id}: {callback_query.data}")
+        return
+
+    if route.admin_only and callback_query.from_user.id not in ADMIN_IDS:
+        await callback_query.answer("🚫 You are not authorized to use this button.", show_alert=True)
+        logger.warning(f"Unauthorized {route.action} callback by user {callback_query.from_user.id}")
+        return
+
+    if route.sheddable and flood_guard.overloaded(client):
+        metrics.inc("callbacks_shed_total", action=route.action)
+        await callback_query.answer("⏳ The bot is busy right now. Please try again in a moment.")
+        return
+
+    # A repeated tap on a button whose previous tap is still being handled is answered, not rerun
+    with flood_guard.claim(callback_query.from_user.id, callback_query.data) as claimed:
+        if not claimed:
+            metrics.inc("callbacks_coalesced_total", action=route.action)
+            await callback_query.answer("⏳ Still working on it...")
+            return
+        with tracing.span(f"callback.{route.action}"):
+            await route.handler(client, callback_query, *args)
@@ -1,63 +1,139 @@
-import logging
-import asyncio
-import sys
-import os
-from threading import Thread
-from pyrogram import Client
-from config import API_ID, API_HASH, BOT_TOKEN, LOG_FILE
-from handlers.health_check import run_health_server
-
-# Add project root to sys.path
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-
-# Setup logging with UTF-8 encoding for file and error handling for console
-class UTF8StreamHandler(logging.StreamHandler):
-    def emit(self, record):
-        try:
-            msg = self.format(record)
-            self.stream.write(msg + self.terminator)
-            self.flush()
-        except UnicodeEncodeError:
-            # Ignore encoding errors in console (e.g., for emojis on Windows)
-            pass
-
-logging.basicConfig(
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    level=logging.INFO,
-    handlers=[
-        logging.FileHandler(LOG_FILE, encoding='utf-8'),
-        UTF8StreamHandler()
-    ]
-)
-logger = logging.getLogger(__name__)
-
-# Create Pyrogram Client
-app = Client(
-    "WhatsAppStatusBot",
-    api_id=API_ID,
-    api_hash=API_HASH,
-    bot_token=BOT_TOKEN,
-    plugins=dict(root="handlers")  # Load handlers from handlers/ and submodules
-)
-
-async def main():
-    logger.info("Starting WhatsApp Status View Increaser Bot...")
-    try:
-        # Start the health check server in a separate thread
-        health_thread = Thread(target=run_health_server, daemon=True)
-        health_thread.start()
-        logger.info("Health check server thread started")
-
-        # Start the bot
-        await app.start()
-        logger.info("Bot started successfully")
-        
-        # Keep the bot running
-        await asyncio.Event().wait()
-        
-    except Exception as e:
-        logger.error(f"Error: {e}")
-        raise
-
-if __name__ == "__main__":
+import logging
+import asyncio
+import atexit
+import sys
+import os
+import socket
+from threading import Thread
+from pyrogram import Client
+from config import API_ID, API_HASH, BOT_TOKEN, BOT_WORKERS, LOG_FILE, AUTO_APPROVE_ENABLED, SUBMISSION_BUFFER_ENABLED
+from handlers.health_check import run_health_server
+from database.connection import connect_to_mongo
+from utils.spool import vcf_spool
+from utils.auto_approve import run_auto_approve_loop
+from utils.job_worker import start_approval_workers
+from utils.locks import run_as_leader
+from utils.intake import submission_buffer
+from utils.reconcile import run_counter_reconcile_loop
+from utils.outbound import install_outbound_scheduler
+from utils.senders import sender_pool
+from utils.updates import install_update_queue, start_admin_workers
+from utils.looplag import loop_monitor
+from utils.recorder import update_recorder
+
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Setup logging with UTF-8 encoding for file and error handling for console
+class UTF8StreamHandler(logging.StreamHandler):
+    def emit(self, record):
+        try:
+            msg = self.format(record)
+            self.stream.write(msg + self.terminator)
+            self.flush()
+        except UnicodeEncodeError:
+            # Ignore encoding errors in console (e.g., for emojis on Windows)
+            pass
+
+logging.basicConfig(
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    level=logging.INFO,
+    handlers=[
+        logging.FileHandler(LOG_FILE, encoding='utf-8'),
+        UTF8StreamHandler()
+    ]
+)
+logger = logging.getLogger(__name__)
+
+# Create Pyrogram Client
+app = Client(
+    "WhatsAppStatusBot",
+    api_id=API_ID,
+    api_hash=API_HASH,
+    bot_token=BOT_TOKEN,
+    workers=BOT_WORKERS,
+    plugins=dict(root="handlers")  # Load handlers from handlers/ and submodules
+)
+
+# Every Telegram call goes through one scheduler: priorities, rate limits and FloodWait handling
+install_outbound_scheduler(app)
+
+# Bounded update backlog with a separate lane for admin commands
+install_update_queue(app)
+
+async def main():
+    logger.info("Starting WhatsApp Status View Increaser Bot...")
+    try:
+        # Start the health check server in a separate thread
+        health_thread = Thread(target=run_health_server, daemon=True)
+        health_thread.start()
+        logger.info("Health check server thread started")
+
+        # Connect to MongoDB first so an unreachable cluster fails startup instead of the first handler
+        await asyncio.to_thread(connect_to_mongo)
+
+        # Write back submissions a previous run buffered but could not flush
+        await asyncio.to_thread(submission_buffer.replay)
+
+        # Start the bot
+        await app.start()
+        logger.info("Bot started successfully")
+
+        # Watch for handlers that block the event loop
+        loop_monitor.start()
+
+        # Admin updates get their own workers so admin commands stay responsive during user bursts
+        admin_worker_tasks = start_admin_workers(app)
+
+        # Start the extra sender bots that share approval notifications and broadcasts
+        await sender_pool.start()
+
+        # Start periodic cleanup of the temp VCF spool (one process per host, since the spool is local disk)
+        spool_cleanup_task = asyncio.create_task(
+            run_as_leader(f"spool-cleanup:{socket.gethostname()}", vcf_spool.run_cleanup_loop)
+        )
+
+        # Start the write-behind submission buffer; anything unflushed at exit is saved to disk
+        if SUBMISSION_BUFFER_ENABLED:
+            submission_flush_task = asyncio.create_task(submission_buffer.run_flush_loop(app))
+            atexit.register(submission_buffer.dump)
+
+        # Keep group member counts and status in step with the sharded seat counters (leader only).
+        # Runs whatever GROUP_COUNTER_SHARDS is now, since generations keep the shard count they started with
+        reconcile_task = asyncio.create_task(run_as_leader("counter-reconcile", run_counter_reconcile_loop))
+
+        # Start the approval workers; jobs are claimed atomically, so every process shares the queue
+        approval_worker_tasks = start_approval_workers(app)
+
+        # Start the auto-approval scheduler for full groups (only the elected leader scans)
+        if AUTO_APPROVE_ENABLED:
+            auto_approve_task = asyncio.create_task(
+                run_as_leader("auto-approve", lambda: run_auto_approve_loop(app))
+            )
+        
+        # Keep the bot running
+        try:
+            await asyncio.Event().wait()
+        finally:
+            # Stop the background loops before the buffer's final flush and the sender bots
+            background_tasks = [spool_cleanup_task, reconcile_task, *approval_worker_tasks]
+            if SUBMISSION_BUFFER_ENABLED:
+                background_tasks.append(submission_flush_task)
+            if AUTO_APPROVE_ENABLED:
+                background_tasks.append(auto_approve_task)
+            for task in background_tasks:
+                task.cancel()
+            await asyncio.gather(*background_tasks, return_exceptions=True)
+            if SUBMISSION_BUFFER_ENABLED:
+                await submission_buffer.close()
+            await sender_pool.stop()
+            for task in admin_worker_tasks:
+                task.cancel()
+            update_recorder.close()
+        
+    except Exception as e:
+        logger.error(f"Error: {e}")
+        raise
+
+if __name__ == "__main__":
     app.run(main())
\ No newline at end of file
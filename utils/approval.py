@@ -0,0 +1,359 @@
+import logging
+import asyncio
+import random
+import time
+from datetime import datetime
+from pyrogram import Client
+from pyrogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+from config import (
+    DOWNLOAD_CHANNEL, VCF_UPLOAD_MODE, SUBMISSION_BUFFER_ENABLED, WORKER_ID, APPROVAL_JOB_LEASE_SECONDS, APPROVAL_JOB_MAX_ATTEMPTS,
+    AUTO_APPROVE_RETRY_BACKOFF, NOTIFY_CHECKPOINT_EVERY, SUBMISSION_DRAIN_TIMEOUT, SUBMISSION_PENDING_ABANDON_AFTER
+)
+from database.groups import get_group, group_counter_shards, rotate_group_generation, reconcile_group_counters, get_frozen_seats
+from database.submissions import get_group_submissions, count_group_submissions, retire_generation
+from database.jobs import (
+    STAGES, create_approval_job, get_approval_job, reset_approval_job, claim_approval_job,
+    checkpoint_approval_job, release_approval_job
+)
+from utils.vcf_generator import generate_vcf, generate_vcf_buffer
+from utils.locks import LeaseLock
+from utils.intake import submission_buffer
+from utils.outbound import outbound_priority, APPROVAL
+from utils.senders import sender_pool
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Seconds between roster counts while waiting for in-flight submissions
+ROSTER_POLL_INTERVAL = 0.5
+
+# Per-group locks so manual and scheduled approvals never run the same group twice, in any worker process
+_group_locks = {}  # Format: {group_id: LeaseLock}
+
+class ApprovalError(Exception):
+    """An approval step failed; the message is safe to show to admins.
+
+    `generation` is set once an approval job exists for the group, so the approval
+    can be resumed for that frozen generation. `requeued` is set when the job was
+    released back to the queue for another try instead of being marked failed.
+    """
+
+    def __init__(self, message: str, generation: int = None, retryable: bool = False):
+        super().__init__(message)
+        self.generation = generation
+        self.retryable = retryable
+        self.requeued = False
+
+def get_group_lock(group_id: str) -> LeaseLock:
+    """Return the approval lock for a group. Entering it raises LockBusy if another process holds it."""
+    lock = _group_locks.get(group_id)
+    if lock is None:
+        lock = _group_locks[group_id] = LeaseLock(f"group:{group_id}")
+    return lock
+
+async def _wait_for_roster(group_id: str, generation: int) -> bool:
+    """Wait until every seat reserved in a rotated generation has its row in Mongo.
+
+    A confirmation reserves its seat before saving its row, directly or through the
+    write-behind buffer of any worker process, so the last rows of a generation can land
+    after its rotation. Polls the row count until it reaches the seat count frozen at
+    rotation (flushing this process's buffer first). Returns False if rows are still
+    missing after SUBMISSION_DRAIN_TIMEOUT seconds. Rows still missing
+    SUBMISSION_PENDING_ABANDON_AFTER seconds after the rotation are presumed lost with a
+    crashed process and no longer block.
+    """
+    deadline = time.monotonic() + SUBMISSION_DRAIN_TIMEOUT
+    while True:
+        if SUBMISSION_BUFFER_ENABLED:
+            await submission_buffer.flush()
+        frozen = await asyncio.to_thread(get_frozen_seats, group_id, generation)
+        if frozen is not None and frozen["seats"] is None:
+            logger.info(f"No frozen seat count for group {group_id} (generation {generation}), not waiting for its rows")
+            return True
+        saved = await asyncio.to_thread(count_group_submissions, group_id, generation) if frozen else None
+        if saved is not None:
+            if saved >= frozen["seats"]:
+                return True
+            age = (datetime.now() - frozen["rotated_at"]).total_seconds()
+            if age > SUBMISSION_PENDING_ABANDON_AFTER:
+                logger.error(
+                    f"{frozen['seats'] - saved} submissions of group {group_id} (generation {generation}) "
+                    f"are still missing {age:.0f}s after rotation, presuming them lost"
+                )
+                return True
+        if time.monotonic() >= deadline:
+            logger.warning(f"Submissions of group {group_id} (generation {generation}) still missing after {SUBMISSION_DRAIN_TIMEOUT}s")
+            return False
+        await asyncio.sleep(ROSTER_POLL_INTERVAL)
+
+async def _upload_vcf(client: Client, group_id: str, vcf_document, total_contacts: int) -> str:
+    """Upload the VCF to the download channel and return the message link."""
+    current_date = datetime.now().strftime("%b %d, %Y")
+    caption = (
+        f"📁 Group: {group_id} VCF\n"
+        f"👥 Total Contacts: {total_contacts}\n"
+        f"📅 Generated on: {current_date}\n\n"
+        f"⚠️ Warning: Do NOT download this file if you didn't submit to this group."
+        f" ▬▬▬▬「 ᴩᴏᴡᴇʀᴇᴅ ʙy 」▬▬▬▬\n"
+        f"              •@Wastatusviewsbot•"
+    )
+
+    # Check if DOWNLOAD_CHANNEL is a dictionary (old format) or direct channel ID
+    if isinstance(DOWNLOAD_CHANNEL, dict):
+        # Old format: {"chat_id": -100xxx, "url": "https://t.me/..."}
+        chat_id = DOWNLOAD_CHANNEL["chat_id"]
+        channel_url = DOWNLOAD_CHANNEL["url"]
+    else:
+        # New format: direct channel ID/username
+        chat_id = DOWNLOAD_CHANNEL
+        # Get channel info to construct URL
+        channel = await client.get_chat(chat_id)
+        channel_url = f"https://t.me/{channel.username}"
+
+    # Send VCF file to download channel
+    sent_message = await client.send_document(
+        chat_id=chat_id,
+        document=vcf_document,
+        caption=caption,
+        file_name=f"VCF_Group_{group_id}.vcf"
+    )
+    return f"{channel_url}/{sent_message.id}"
+
+async def _notify_user(client: Client, job: dict, user_id: int, rate_limiter, reachable=None) -> bool:
+    try:
+        if rate_limiter is not None:
+            await rate_limiter.acquire()
+        with outbound_priority(APPROVAL):
+            await sender_pool.deliver(
+                user_id,
+                lambda sender: sender.send_message(
+                    chat_id=user_id,
+                    text=(
+                        "✅ Your group's VCF file is ready!\n"
+                        "📥 Download it from our channel below 👇"
+                    ),
+                    reply_markup=InlineKeyboardMarkup([
+                        [InlineKeyboardButton("📥 Download VCF File", url=job["download_url"])]
+                    ])
+                ),
+                primary=client,
+                reachable=reachable
+            )
+        logger.debug(f"Notified user {user_id} about VCF ready for group {job['group_id']}")
+        return True
+    except Exception as e:
+        logger.error(f"Failed to notify user {user_id} for group {job['group_id']}: {e}")
+        return False
+
+async def _notify_users(client: Client, job: dict, rate_limiter, checkpoint) -> int:
+    """Tell every member of the approved generation that the VCF is ready.
+
+    Members are walked in user_id order from the job's persisted cursor, in batches of
+    NOTIFY_CHECKPOINT_EVERY sent concurrently (spread over the sender pool), and the
+    cursor is checkpointed after each batch, so a resumed job does not notify the same
+    users again.
+    """
+    notified_users = job.get("notified", 0)
+    cursor = job.get("notify_cursor")
+    users = await asyncio.to_thread(get_group_submissions, job["group_id"], job["generation"], after_user_id=cursor)
+    for start in range(0, len(users), NOTIFY_CHECKPOINT_EVERY):
+        batch = users[start:start + NOTIFY_CHECKPOINT_EVERY]
+        reachable = await sender_pool.reachable([user["user_id"] for user in batch])
+        results = await asyncio.gather(*(
+            _notify_user(client, job, user["user_id"], rate_limiter, reachable.get(user["user_id"], ()))
+            for user in batch
+        ))
+        notified_users += sum(results)
+        cursor = batch[-1]["user_id"]
+        await checkpoint(notify_cursor=cursor, notified=notified_users)
+    await checkpoint(stage="notified", notify_cursor=cursor, notified=notified_users)
+    return notified_users
+
+def _job_summary(job: dict) -> dict:
+    return {
+        "group_id": job["group_id"],
+        "generation": job["generation"],
+        "total": job.get("total", 0),
+        "notified": job.get("notified", 0),
+        "download_url": job.get("download_url")
+    }
+
+async def _run_stages(client: Client, job: dict, rate_limiter) -> dict:
+    """Run the remaining stages of a claimed approval job, persisting each one as it completes.
+
+    Mongo calls and VCF rendering run in worker threads, so a large approval does not
+    stall the bot's other updates.
+    """
+    job_id, group_id, generation = job["_id"], job["group_id"], job["generation"]
+
+    async def checkpoint(**fields):
+        if not await asyncio.to_thread(checkpoint_approval_job, job_id, WORKER_ID, APPROVAL_JOB_LEASE_SECONDS, **fields):
+            raise ApprovalError(f"❌ Lost the approval lease for group {group_id}.", generation=generation)
+        job.update(fields)
+
+    def done(stage: str) -> bool:
+        return STAGES.index(job["stage"]) >= STAGES.index(stage)
+
+    if not done("rotated"):
+        # Rotate first: new submissions go straight into the next generation while we work on this one.
+        # Rotation is conditional on the generation, so repeating it after a crash is a no-op.
+        if not await asyncio.to_thread(rotate_group_generation, group_id, generation):
+            group = await asyncio.to_thread(get_group, group_id, retry=True)
+            if not group or group["generation"] <= generation:
+                raise ApprovalError(f"❌ Failed to rotate group {group_id}.", generation=generation, retryable=True)
+        await checkpoint(stage="rotated")
+
+    if not done("uploaded"):
+        # Seats of the frozen generation may still have rows being saved by any worker process
+        if not await _wait_for_roster(group_id, generation):
+            raise ApprovalError(
+                f"⏳ Submissions to group {group_id} are still being saved.\n"
+                f"Retry with /approve {group_id} {generation}",
+                generation=generation, retryable=True
+            )
+
+        # 1️⃣ Collect all submissions in the frozen generation
+        users = await asyncio.to_thread(get_group_submissions, group_id, generation)
+        if not users:
+            raise ApprovalError(f"❌ No users found in group {group_id}", generation=generation)
+        total_contacts = len(users)
+        await checkpoint(stage="rendered", total=total_contacts)
+        logger.info(f"Collected {total_contacts} submissions from group {group_id}")
+
+        # 2️⃣ & 3️⃣ Generate VCF file (in-memory buffer unless disk mode is configured)
+        if VCF_UPLOAD_MODE == "disk":
+            vcf_document = await asyncio.to_thread(generate_vcf, group_id, generation)
+        else:
+            vcf_document = await asyncio.to_thread(generate_vcf_buffer, group_id, generation)
+        if not vcf_document:
+            raise ApprovalError(
+                f"❌ Failed to generate VCF file for group {group_id}.\n"
+                f"Retry with /approve {group_id} {generation}",
+                generation=generation, retryable=True
+            )
+        logger.info(f"Generated VCF file for group {group_id}")
+
+        # 4️⃣ Upload file to download channel with proper caption
+        try:
+            download_url = await _upload_vcf(client, group_id, vcf_document, total_contacts)
+            logger.info(f"Uploaded VCF file for group {group_id} to download channel")
+        except Exception as e:
+            logger.error(f"Failed to upload VCF for group {group_id} to channel: {e}")
+            raise ApprovalError(
+                f"❌ Failed to upload VCF file to channel: {e}\n"
+                f"Retry with /approve {group_id} {generation}",
+                generation=generation, retryable=True
+            ) from e
+        finally:
+            # Release the buffer (and any spilled temp file) as soon as the upload is done
+            if not isinstance(vcf_document, str):
+                vcf_document.close()
+        # Persist immediately so a restart never uploads the same generation twice
+        await checkpoint(stage="uploaded", download_url=download_url)
+
+    # 5️⃣ Notify all users in that group
+    if not done("notified"):
+        await _notify_users(client, job, rate_limiter, checkpoint)
+
+    # Hand the approved generation over to the TTL index for background purging
+    if not done("retired"):
+        await asyncio.to_thread(retire_generation, group_id, generation)
+        await checkpoint(stage="retired")
+
+    logger.info(f"Approved group {group_id}: {job.get('notified', 0)}/{job.get('total', 0)} users notified, VCF uploaded")
+    return _job_summary(job)
+
+async def run_approval_job(client: Client, job: dict, rate_limiter=None, max_retries: int = 0) -> dict:
+    """Resume a claimed approval job from its last completed stage.
+
+    Retryable failures are retried in place up to `max_retries` times with jittered
+    exponential backoff. After that the job is released back to the queue (or marked
+    failed once APPROVAL_JOB_MAX_ATTEMPTS claims are used up) and the error is raised.
+    """
+    job_id = job["_id"]
+    attempt = 0
+    while True:
+        try:
+            summary = await _run_stages(client, job, rate_limiter)
+            await asyncio.to_thread(release_approval_job, job_id, WORKER_ID, "done")
+            return summary
+        except Exception as e:
+            retryable = not isinstance(e, ApprovalError) or e.retryable
+            backoff = AUTO_APPROVE_RETRY_BACKOFF * 2 ** attempt * random.uniform(0.5, 1.5)
+            if retryable and attempt < max_retries:
+                logger.warning(f"Approval job {job_id} failed (attempt {attempt + 1}), retrying in {backoff:.0f}s: {e}")
+                # Keep holding the job while we back off
+                await asyncio.to_thread(checkpoint_approval_job, job_id, WORKER_ID, APPROVAL_JOB_LEASE_SECONDS + int(backoff))
+                await asyncio.sleep(backoff)
+                attempt += 1
+                continue
+            requeued = retryable and job.get("attempts", 0) < APPROVAL_JOB_MAX_ATTEMPTS
+            if requeued:
+                await asyncio.to_thread(release_approval_job, job_id, WORKER_ID, "pending", str(e), retry_after=backoff)
+            else:
+                await asyncio.to_thread(release_approval_job, job_id, WORKER_ID, "failed", str(e))
+            if isinstance(e, ApprovalError):
+                e.requeued = requeued
+                raise
+            error = ApprovalError(f"❌ {e}", generation=job["generation"], retryable=True)
+            error.requeued = requeued
+            raise error from e
+
+async def approve_group(client: Client, group_id: str, generation: int = None, rate_limiter=None,
+                        requested_by: int = None, max_retries: int = 0) -> dict:
+    """Approve a group through a persisted, resumable approval job.
+
+    Without `generation`, a job is queued for the group's current generation (a no-op if it
+    already exists) and run inline: rotate, render, upload, notify and retire. With
+    `generation` set, the existing job of that earlier generation is resumed instead.
+    A job that already finished returns its stored summary without uploading or notifying again.
+    Notifications wait on `rate_limiter` (an AsyncTokenBucket) when one is shared between
+    concurrent approvals. Raises ApprovalError on failure.
+    """
+    group = await asyncio.to_thread(get_group, group_id, retry=True)
+    if not group:
+        raise ApprovalError(f"❌ Group {group_id} not found.")
+
+    if generation is not None:
+        job = await asyncio.to_thread(get_approval_job, group_id, generation)
+        if not job:
+            raise ApprovalError(f"❌ No approval job found for generation {generation} of group {group_id}.")
+        # An explicit resume runs a failed or backed-off job now instead of waiting for its retry
+        job = await asyncio.to_thread(reset_approval_job, job["_id"]) or job
+    else:
+        generation = group["generation"]
+        if group_counter_shards(group) > 1:
+            # Sharded seat counts only reach the group document when reconciled
+            group = await asyncio.to_thread(reconcile_group_counters, group_id, generation) or group
+        if group["current_users"] == 0:
+            raise ApprovalError(f"❌ No users found in group {group_id}")
+        job = await asyncio.to_thread(create_approval_job, group_id, generation, requested_by)
+        if not job:
+            raise ApprovalError(f"❌ Failed to queue approval of group {group_id}.", retryable=True)
+
+    if job["status"] == "done":
+        logger.info(f"Approval job {job['_id']} already completed, returning stored result")
+        return _job_summary(job)
+
+    claimed = await asyncio.to_thread(claim_approval_job, job["_id"], WORKER_ID, APPROVAL_JOB_LEASE_SECONDS)
+    if not claimed:
+        await _raise_unclaimed(group_id, generation)
+    return await run_approval_job(client, claimed, rate_limiter, max_retries)
+
+async def _raise_unclaimed(group_id: str, generation: int):
+    """Explain why an approval job could not be claimed."""
+    job = await asyncio.to_thread(get_approval_job, group_id, generation) or {}
+    resume = f"/approve {group_id} {generation}"
+    if job.get("status") == "failed":
+        raise ApprovalError(
+            f"❌ Approval of group {group_id} failed: {job.get('error') or 'unknown error'}\n"
+            f"Resume it with {resume}",
+            generation=generation
+        )
+    if job.get("status") == "pending":
+        raise ApprovalError(
+            f"⏳ Approval of group {group_id} failed and is scheduled to retry at {job['lease_until']:%H:%M:%S}.\n"
+            f"Resume it now with {resume}",
+            generation=generation
+        )
+    raise ApprovalError(f"Group {group_id} is already being approved by another worker.", generation=generation)
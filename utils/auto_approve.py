@@ -0,0 +1,91 @@
+import logging
+import asyncio
+from datetime import datetime, timedelta
+from pyrogram import Client
+from config import (
+    ADMIN_IDS, AUTO_APPROVE_INTERVAL, AUTO_APPROVE_CONCURRENCY, AUTO_APPROVE_GRACE_SECONDS,
+    AUTO_APPROVE_MAX_RETRIES, APPROVE_SEND_RATE
+)
+from database.groups import get_full_groups
+from utils.approval import approve_group, get_group_lock, ApprovalError
+from utils.ratelimit import AsyncTokenBucket
+from utils.locks import LockBusy, LeaseLost
+from utils.senders import sender_pool
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+async def approve_with_retry(client: Client, group_id: str, max_retries: int = AUTO_APPROVE_MAX_RETRIES, rate_limiter=None) -> dict:
+    """Approve a group, retrying failed stages with exponential backoff and jitter.
+
+    Returns the approval summary, or {"group_id": ..., "error": ...} once retries are exhausted.
+    A job that still fails is left in the queue for the approval workers to resume later.
+    """
+    try:
+        return await approve_group(client, group_id, rate_limiter=rate_limiter, max_retries=max_retries)
+    except ApprovalError as e:
+        return {"group_id": group_id, "error": str(e)}
+    except Exception as e:
+        logger.error(f"Approval of group {group_id} failed: {e}", exc_info=True)
+        return {"group_id": group_id, "error": f"❌ {e}"}
+
+def format_approval_summary(title: str, results) -> str:
+    """Build an admin summary of approval results."""
+    lines = [title, ""]
+    for result in results:
+        if "error" in result:
+            lines.append(f"❌ {result['group_id']}: {result['error']}")
+        else:
+            lines.append(f"✅ {result['group_id']}: {result['notified']}/{result['total']} notified")
+    return "\n".join(lines)
+
+async def _notify_admins(client: Client, text: str):
+    for admin_id in ADMIN_IDS:
+        try:
+            await client.send_message(chat_id=admin_id, text=text)
+        except Exception as e:
+            logger.warning(f"Failed to send auto-approval summary to admin {admin_id}: {e}")
+
+async def run_auto_approval_pass(client: Client):
+    """Approve every group that has been full for at least the grace period."""
+    cutoff = datetime.now() - timedelta(seconds=AUTO_APPROVE_GRACE_SECONDS)
+    groups = await asyncio.to_thread(get_full_groups, cutoff, None, {"group_id": 1})
+    if not groups:
+        return []
+
+    semaphore = asyncio.Semaphore(AUTO_APPROVE_CONCURRENCY)
+    # Parallel approvals share one notification budget, scaled by the sender bots' usable reach
+    rate_limiter = AsyncTokenBucket(APPROVE_SEND_RATE * await sender_pool.capacity())
+
+    async def process(group_id: str):
+        async with semaphore:
+            lock = get_group_lock(group_id)
+            if lock.locked():
+                logger.info(f"Group {group_id} is already being approved, skipping in auto-approval")
+                return None
+            try:
+                async with lock:
+                    return await approve_with_retry(client, group_id, rate_limiter=rate_limiter)
+            except LeaseLost:
+                logger.warning(f"Lost the lock of group {group_id} during auto-approval, a worker will resume it")
+                return None
+            except LockBusy:
+                logger.info(f"Group {group_id} is locked by another worker, skipping in auto-approval")
+                return None
+
+    results = await asyncio.gather(*(process(group["group_id"]) for group in groups))
+    results = [result for result in results if result is not None]
+    if results:
+        await _notify_admins(client, format_approval_summary("🤖 Auto-Approval Summary", results))
+        logger.info(f"Auto-approval pass processed {len(results)} full groups")
+    return results
+
+async def run_auto_approve_loop(client: Client, interval: int = AUTO_APPROVE_INTERVAL):
+    """Scan for full groups forever and approve them."""
+    logger.info(f"Auto-approval scheduler started (every {interval}s, concurrency {AUTO_APPROVE_CONCURRENCY})")
+    while True:
+        try:
+            await run_auto_approval_pass(client)
+        except Exception as e:
+            logger.error(f"Auto-approval pass failed: {e}", exc_info=True)
+        await asyncio.sleep(interval)
@@ -0,0 +1,52 @@
+import threading
+import time
+from collections import OrderedDict
+from utils import metrics
+
+class LRUCache:
+    """Bounded least-recently-used cache with optional per-entry expiry.
+
+    Safe to share between the event loop and worker threads. Hits and misses are
+    published as cache_hits_total / cache_misses_total labelled with `name`.
+    """
+
+    def __init__(self, maxsize: int, ttl: float = None, name: str = "cache"):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.name = name
+        self._data = OrderedDict()  # Format: {key: (expires_at, value)}
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Return the cached value for `key`, or `default` if it is missing or expired."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and (entry[0] is None or entry[0] > time.monotonic()):
+                self._data.move_to_end(key)
+                metrics.inc("cache_hits_total", cache=self.name)
+                return entry[1]
+            if entry is not None:
+                del self._data[key]
+        metrics.inc("cache_misses_total", cache=self.name)
+        return default
+
+    def set(self, key, value):
+        """Cache `value` under `key`, evicting the least recently used entry when full."""
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        """Drop `key` from the cache."""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
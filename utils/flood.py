@@ -0,0 +1,60 @@
+import logging
+from contextlib import contextmanager
+from config import FLOOD_USER_RATE, FLOOD_USER_BURST, FLOOD_NOTICE_INTERVAL, FLOOD_SHED_QUEUE_DEPTH
+from utils.cache import LRUCache
+from utils.ratelimit import TokenBucket
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+class FloodGuard:
+    """Per-user admission control for incoming updates.
+
+    Each user gets a token bucket; updates beyond it are dropped before any handler
+    runs. Identical requests already being handled for a user are coalesced, and when
+    the outbound queue backs up, low-priority buttons are refused so the bot keeps
+    serving submissions.
+    """
+
+    def __init__(self, rate: float = FLOOD_USER_RATE, burst: float = FLOOD_USER_BURST):
+        self.rate = rate
+        self.burst = burst
+        self._buckets = LRUCache(100000, ttl=600, name="flood_buckets")  # Format: {user_id: TokenBucket}
+        self._noticed = LRUCache(100000, ttl=FLOOD_NOTICE_INTERVAL, name="flood_notices")  # Format: {user_id: True}
+        self._inflight = set()  # Format: {(user_id, request key)}
+
+    def allow(self, user_id: int) -> bool:
+        """Take one token from the user's bucket."""
+        bucket = self._buckets.get(user_id)
+        if bucket is None:
+            bucket = TokenBucket(self.rate, self.burst)
+            self._buckets.set(user_id, bucket)
+        return bucket.try_acquire()
+
+    def should_notify(self, user_id: int) -> bool:
+        """Whether to tell a throttled user to slow down; at most once per FLOOD_NOTICE_INTERVAL."""
+        if self._noticed.get(user_id):
+            return False
+        self._noticed.set(user_id, True)
+        return True
+
+    @contextmanager
+    def claim(self, user_id: int, key: str):
+        """Yield True if this request is not already in flight for the user, else False."""
+        entry = (user_id, key)
+        if entry in self._inflight:
+            yield False
+            return
+        self._inflight.add(entry)
+        try:
+            yield True
+        finally:
+            self._inflight.discard(entry)
+
+    def overloaded(self, client) -> bool:
+        """Whether the client's outbound queue is backed up past FLOOD_SHED_QUEUE_DEPTH."""
+        scheduler = getattr(client, "outbound_scheduler", None)
+        return scheduler is not None and scheduler.backlog() >= FLOOD_SHED_QUEUE_DEPTH
+
+# Shared guard used by the flood middleware and the callback router
+flood_guard = FloodGuard()
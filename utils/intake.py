@@ -0,0 +1,211 @@
+import logging
+import asyncio
+import json
+import os
+from datetime import datetime
+from pymongo import InsertOne
+from pymongo.errors import PyMongoError, BulkWriteError
+from config import SUBMISSION_FLUSH_SIZE, SUBMISSION_FLUSH_INTERVAL, SUBMISSION_BUFFER_FILE
+from database.connection import get_db
+from database.groups import release_group_seat
+from database.submissions import user_groups_cache
+from utils import metrics
+from utils.ui import SUBMISSION_DROPPED_TEMPLATE, TRY_AGAIN_MARKUP
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY = 11000
+
+def submission_row_id(group_id: str, generation: int, user_id: int) -> str:
+    """Deterministic _id, so replaying a row that already reached Mongo is recognisable."""
+    return f"{group_id}:{generation}:{user_id}"
+
+class SubmissionBuffer:
+    """Write-behind buffer for submission rows.
+
+    Confirmations reserve their seat synchronously and then only append here; rows are
+    written with unordered bulk inserts once `flush_size` rows are waiting or every
+    `flush_interval` seconds. Rows still in memory at shutdown are appended to `path` and
+    replayed on the next start. Pending users and numbers are indexed so duplicate checks
+    see rows that have not reached Mongo yet.
+
+    Every buffered row holds a reserved seat, so approvals wait for buffered rows the same
+    way they wait for any other in-flight save (see utils.approval).
+    Users whose acknowledged row turns out to be a duplicate get their seat released and
+    are told so by the flush loop.
+    """
+
+    def __init__(self, path: str, flush_size: int, flush_interval: float):
+        self.path = path
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self._rows = []
+        self._inflight = []
+        self._dropped = []  # Acknowledged rows dropped as duplicates, waiting for their user to be told
+        self._client = None
+        self._users = set()  # Format: {(group_id, generation, user_id)}
+        self._numbers = {}  # Format: {(group_id, generation, number_key): user_id}
+        self._wakeup = None
+        self._flush_lock = None
+
+    def pending_conflict(self, group_id: str, generation: int, user_id: int, number_key: str):
+        """Return "user" or "number" if a buffered row already claims either, else None."""
+        if (group_id, generation, user_id) in self._users:
+            return "user"
+        owner = self._numbers.get((group_id, generation, number_key))
+        if owner is not None and owner != user_id:
+            return "number"
+        return None
+
+    def add(self, user_id: int, name: str, number: str, group_id: str, generation: int) -> bool:
+        """Buffer a submission whose seat is already reserved. Returns False on a pending duplicate."""
+        if self.pending_conflict(group_id, generation, user_id, number):
+            return False
+        self._rows.append({
+            "_id": submission_row_id(group_id, generation, user_id),
+            "user_id": user_id,
+            "group_id": group_id,
+            "generation": generation,
+            "name": name,
+            "number": number,
+            "number_key": number,
+            "created_at": datetime.now()
+        })
+        self._users.add((group_id, generation, user_id))
+        self._numbers[(group_id, generation, number)] = user_id
+        user_groups_cache.pop(user_id)
+        metrics.set_gauge("submission_buffer_pending", len(self._rows))
+        if len(self._rows) >= self.flush_size and self._wakeup is not None:
+            self._wakeup.set()
+        return True
+
+    def _forget(self, row: dict):
+        self._users.discard((row["group_id"], row["generation"], row["user_id"]))
+        self._numbers.pop((row["group_id"], row["generation"], row["number_key"]), None)
+
+    def _write(self, rows):
+        """Bulk insert `rows`.
+
+        Returns (rows that hit a transient error and should be retried, rows dropped as
+        genuine duplicates).
+        """
+        db = get_db()
+        retry, dropped = [], []
+        try:
+            db.submissions.bulk_write([InsertOne(row) for row in rows], ordered=False)
+        except BulkWriteError as e:
+            for error in e.details.get("writeErrors", []):
+                row = rows[error["index"]]
+                if error.get("code") != DUPLICATE_KEY:
+                    retry.append(row)
+                elif not db.submissions.find_one({"_id": row["_id"]}, {"_id": 1}):
+                    # A genuine duplicate (same user or number already saved): hand its seat back
+                    logger.warning(f"Dropped duplicate buffered submission of user {row['user_id']} in group {row['group_id']}")
+                    release_group_seat(row["group_id"], row["generation"])
+                    metrics.inc("submission_buffer_duplicates_total")
+                    dropped.append(row)
+                # Otherwise the row was already written before a restart; nothing to do
+        except PyMongoError as e:
+            logger.error(f"Failed to flush {len(rows)} buffered submissions: {e}")
+            return rows, []
+        return retry, dropped
+
+    async def _notify_dropped(self):
+        """Tell users whose acknowledged submission was dropped as a duplicate."""
+        while self._dropped and self._client is not None:
+            row = self._dropped.pop(0)
+            try:
+                await self._client.send_message(
+                    chat_id=row["user_id"],
+                    text=SUBMISSION_DROPPED_TEMPLATE.format(number=row["number"], group_id=row["group_id"]),
+                    reply_markup=TRY_AGAIN_MARKUP
+                )
+            except Exception as e:
+                logger.warning(f"Failed to tell user {row['user_id']} about their dropped submission: {e}")
+
+    async def flush(self):
+        """Write every buffered row now; rows that fail transiently go back to the buffer."""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            if not self._rows:
+                return
+            self._inflight, self._rows = self._rows, []
+            retry, dropped = await asyncio.to_thread(self._write, self._inflight)
+            self._dropped += dropped
+            retry_ids = {row["_id"] for row in retry}
+            for row in self._inflight:
+                if row["_id"] not in retry_ids:
+                    self._forget(row)
+            metrics.inc("submission_buffer_flushes_total")
+            metrics.inc("submission_buffer_rows_total", len(self._inflight) - len(retry))
+            logger.debug(f"Flushed {len(self._inflight) - len(retry)} buffered submissions")
+            self._rows[:0] = retry
+            self._inflight = []
+            metrics.set_gauge("submission_buffer_pending", len(self._rows))
+
+    async def run_flush_loop(self, client):
+        """Flush by size (woken by add) or every flush_interval seconds, until cancelled.
+
+        `client` is used to tell users about submissions dropped as duplicates.
+        """
+        self._client = client
+        self._wakeup = asyncio.Event()
+        logger.info(f"Submission buffer started (flush at {self.flush_size} rows or every {self.flush_interval}s)")
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+                await self._notify_dropped()
+            except Exception as e:
+                logger.error(f"Submission buffer flush failed: {e}", exc_info=True)
+
+    def dump(self):
+        """Append unflushed rows to the fallback file. Safe to call from atexit."""
+        rows = self._inflight + self._rows
+        if not rows:
+            return
+        with open(self.path, "a", encoding="utf-8") as f:
+            for row in rows:
+                f.write(json.dumps({**row, "created_at": row["created_at"].isoformat()}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        logger.warning(f"Saved {len(rows)} unflushed submissions to {self.path}")
+        self._rows, self._inflight = [], []
+
+    async def close(self):
+        """Flush on shutdown, keeping whatever could not be written in the fallback file."""
+        try:
+            await self.flush()
+        finally:
+            self.dump()
+
+    def replay(self):
+        """Write rows saved by a previous shutdown; rows that still fail stay in the file."""
+        if not os.path.exists(self.path):
+            return 0
+        with open(self.path, encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+        for row in rows:
+            row["created_at"] = datetime.fromisoformat(row["created_at"])
+        retry, dropped = self._write(rows) if rows else ([], [])
+        # Told once the flush loop starts with a client
+        self._dropped += dropped
+        if retry:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for row in retry:
+                    f.write(json.dumps({**row, "created_at": row["created_at"].isoformat()}) + "\n")
+            os.replace(tmp_path, self.path)
+        else:
+            os.remove(self.path)
+        logger.info(f"Replayed {len(rows) - len(retry)} of {len(rows)} saved submissions from {self.path}")
+        return len(rows) - len(retry)
+
+# Shared write-behind buffer, used when SUBMISSION_BUFFER_ENABLED is set
+submission_buffer = SubmissionBuffer(SUBMISSION_BUFFER_FILE, SUBMISSION_FLUSH_SIZE, SUBMISSION_FLUSH_INTERVAL)
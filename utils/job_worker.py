@@ -0,0 +1,65 @@
+import logging
+import asyncio
+from pyrogram import Client
+from config import WORKER_ID, APPROVAL_WORKERS, APPROVAL_JOB_LEASE_SECONDS, APPROVAL_JOB_POLL_INTERVAL
+from database.jobs import claim_next_approval_job, release_approval_job
+from utils.approval import run_approval_job, get_group_lock, ApprovalError
+from utils.locks import LockBusy
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+async def _report(client: Client, job: dict, text: str):
+    """Send the outcome of a resumed job to the admin who requested it, if any."""
+    if not job.get("requested_by"):
+        return
+    try:
+        await client.send_message(chat_id=job["requested_by"], text=text)
+    except Exception as e:
+        logger.warning(f"Failed to report approval job {job['_id']} to {job['requested_by']}: {e}")
+
+async def _approval_worker(client: Client, index: int):
+    """Claim and run pending or abandoned approval jobs until cancelled."""
+    while True:
+        try:
+            job = await asyncio.to_thread(claim_next_approval_job, WORKER_ID, APPROVAL_JOB_LEASE_SECONDS)
+            if not job:
+                await asyncio.sleep(APPROVAL_JOB_POLL_INTERVAL)
+                continue
+
+            logger.info(f"Approval worker {index} resuming job {job['_id']} at stage {job['stage']}")
+            try:
+                async with get_group_lock(job["group_id"]):
+                    result = await run_approval_job(client, job)
+            except LockBusy:
+                # Another process is approving this group right now; hand the job back for later
+                await asyncio.to_thread(
+                    release_approval_job, job["_id"], WORKER_ID, "pending", None, APPROVAL_JOB_POLL_INTERVAL
+                )
+                continue
+            except ApprovalError as e:
+                if e.requeued:
+                    # Released back to pending; whichever worker claims it next reports the outcome
+                    logger.warning(f"Approval job {job['_id']} will be retried: {e}")
+                    continue
+                logger.warning(f"Approval job {job['_id']} failed: {e}")
+                await _report(client, job, f"⚠️ Approval of {job['group_id']} (generation {job['generation']}) failed:\n{e}")
+                continue
+
+            await _report(
+                client, job,
+                f"✅ Approval Process Completed!\n\n"
+                f"📊 Group: {result['group_id']}\n"
+                f"👥 Notified Users: {result['notified']}/{result['total']}\n"
+                f"📥 {result['download_url']}"
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Approval worker {index} crashed on a job: {e}", exc_info=True)
+            await asyncio.sleep(APPROVAL_JOB_POLL_INTERVAL)
+
+def start_approval_workers(client: Client, count: int = APPROVAL_WORKERS):
+    """Start the approval worker pool and return its tasks."""
+    logger.info(f"Starting {count} approval workers as {WORKER_ID}")
+    return [asyncio.create_task(_approval_worker(client, index)) for index in range(count)]
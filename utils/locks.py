@@ -0,0 +1,129 @@
+import logging
+import asyncio
+import time
+from config import WORKER_ID, LOCK_LEASE_SECONDS, LEADER_LEASE_SECONDS
+from database.locks import acquire_lock, release_lock
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Fraction of a lease left at which renewals that keep failing count as a lost lease
+LEASE_SAFETY_MARGIN = 0.2
+
+class LockBusy(Exception):
+    """The lock is held by another worker process."""
+
+class LeaseLost(LockBusy):
+    """The lease ran out while the lock was held, so the guarded work was cancelled."""
+
+def lease_expired(renewed_at: float, lease_seconds: int) -> bool:
+    """Whether a lease last renewed at `renewed_at` (monotonic) can no longer be relied on."""
+    return time.monotonic() - renewed_at >= lease_seconds * (1 - LEASE_SAFETY_MARGIN)
+
+class LeaseLock:
+    """A lock shared by every worker process through a Mongo lease.
+
+    Coroutines in this process queue on a local asyncio.Lock first; the holder then takes
+    the Mongo lease, which is renewed in the background for as long as the lock is held.
+    Entering raises LockBusy instead of waiting when another process holds the lease.
+    Renewals that fail on a Mongo error are retried; if the lease is taken over or runs
+    out before a renewal succeeds, the holder is cancelled and the block raises LeaseLost.
+    """
+
+    def __init__(self, name: str, lease_seconds: int = LOCK_LEASE_SECONDS):
+        self.name = name
+        self.lease_seconds = lease_seconds
+        self._local = asyncio.Lock()
+        self._renewer = None
+        self._holder = None
+        self._lost = False
+
+    def locked(self) -> bool:
+        """Whether this process currently holds or is acquiring the lock."""
+        return self._local.locked()
+
+    async def _renew(self):
+        renewed_at = time.monotonic()
+        interval = self.lease_seconds / 3
+        while True:
+            await asyncio.sleep(interval)
+            renewed = await asyncio.to_thread(acquire_lock, self.name, WORKER_ID, self.lease_seconds)
+            if renewed:
+                renewed_at, interval = time.monotonic(), self.lease_seconds / 3
+                continue
+            if renewed is None and not lease_expired(renewed_at, self.lease_seconds):
+                # Mongo was unreachable but the lease still covers us; retry sooner
+                logger.warning(f"Failed to renew lease on lock {self.name}, retrying")
+                interval = self.lease_seconds / 10
+                continue
+            logger.error(f"Lost lease on lock {self.name} while holding it, cancelling the holder")
+            self._lost = True
+            self._holder.cancel()
+            return
+
+    async def __aenter__(self):
+        await self._local.acquire()
+        try:
+            if not await asyncio.to_thread(acquire_lock, self.name, WORKER_ID, self.lease_seconds):
+                raise LockBusy(self.name)
+        except BaseException:
+            self._local.release()
+            raise
+        self._holder = asyncio.current_task()
+        self._lost = False
+        self._renewer = asyncio.create_task(self._renew())
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._renewer.cancel()
+        self._renewer = None
+        lost, self._lost = self._lost, False
+        try:
+            await asyncio.to_thread(release_lock, self.name, WORKER_ID)
+        finally:
+            self._holder = None
+            self._local.release()
+        if lost and exc_type is asyncio.CancelledError:
+            # The cancellation came from _renew, not from whoever awaits the holder
+            task = asyncio.current_task()
+            if hasattr(task, "uncancel"):
+                task.uncancel()
+            raise LeaseLost(self.name) from exc
+
+async def run_as_leader(name: str, factory, lease_seconds: int = LEADER_LEASE_SECONDS):
+    """Run the singleton task `factory()` only while this process is the leader for `name`.
+
+    Every process calls this; the one holding the `leader:<name>` lease runs the task and
+    renews the lease every third of its length. If the lease is lost the task is cancelled,
+    and another process takes over once the lease expires. Renewals that fail on a Mongo
+    error keep the task running for as long as the last successful renewal covers it.
+    """
+    lock_name = f"leader:{name}"
+    task = None
+    renewed_at = None
+    try:
+        while True:
+            leader = await asyncio.to_thread(acquire_lock, lock_name, WORKER_ID, lease_seconds)
+            if leader:
+                renewed_at = time.monotonic()
+            elif leader is None and task is not None and not lease_expired(renewed_at, lease_seconds):
+                logger.warning(f"Failed to renew leadership for {name}, retrying")
+                await asyncio.sleep(lease_seconds / 10)
+                continue
+            if leader and task is None:
+                logger.info(f"{WORKER_ID} became leader for {name}")
+                task = asyncio.create_task(factory())
+            elif not leader and task is not None:
+                logger.warning(f"{WORKER_ID} lost leadership for {name}, stopping it")
+                task.cancel()
+                task = None
+            elif task is not None and task.done():
+                # Restart a crashed singleton on the next round while we still lead
+                if not task.cancelled() and task.exception():
+                    logger.error(f"Leader task {name} crashed: {task.exception()}")
+                task = None
+            await asyncio.sleep(lease_seconds / 3)
+    finally:
+        if task is not None:
+            task.cancel()
+        await asyncio.to_thread(release_lock, lock_name, WORKER_ID)
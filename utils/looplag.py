@@ -0,0 +1,114 @@
+import logging
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, deque
+from config import LOOP_LAG_INTERVAL, LOOP_LAG_THRESHOLD
+from utils import metrics
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _project_path(filename: str):
+    """`filename` relative to the project root, or None for library and stdlib code."""
+    path = os.path.abspath(filename)
+    if not path.startswith(PROJECT_ROOT + os.sep) or os.sep + "site-packages" + os.sep in path:
+        return None
+    return os.path.relpath(path, PROJECT_ROOT)
+
+def _attribute(stack):
+    """Return (handler, blocking frame) labels for a stack listed outermost first.
+
+    Only frames of the task the loop is running count (those after asyncio's callback
+    runner). The handler is the innermost frame under handlers/, or the task's root
+    coroutine for background tasks; the blocking frame is the innermost project frame.
+    """
+    start = 0
+    for index, frame in enumerate(stack):
+        if frame.filename.endswith(os.path.join("asyncio", "events.py")):
+            start = index + 1
+    handler = root = blocking = None
+    for frame in stack[start:]:
+        path = _project_path(frame.filename)
+        if path is None:
+            continue
+        label = f"{path}:{frame.name}"
+        blocking = f"{label}:{frame.lineno}"
+        root = root or label
+        if path.startswith("handlers" + os.sep):
+            handler = label
+    return handler or root or "unknown", blocking or "unknown"
+
+class LoopLagMonitor:
+    """Measures event-loop lag and catches the code that blocks the loop.
+
+    A heartbeat task sleeps LOOP_LAG_INTERVAL and records how late it wakes up. A
+    watchdog thread watches the heartbeat; when it has not run for LOOP_LAG_THRESHOLD,
+    the loop thread's stack is captured with sys._current_frames(), attributed to the
+    handler that is running, logged and counted per handler.
+    """
+
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL, threshold: float = LOOP_LAG_THRESHOLD):
+        self.interval = interval
+        self.threshold = threshold
+        self.incidents = Counter()  # Format: {handler: stalls}
+        self.recent = deque(maxlen=20)  # Latest incidents, newest last
+        self.max_lag = 0.0
+        self.last_lag = 0.0
+        self._beat = time.monotonic()
+        self._loop_thread_id = None
+        self._task = None
+
+    async def _heartbeat(self):
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self._beat = time.monotonic()
+            lag = max(0.0, self._beat - started - self.interval)
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            metrics.observe("event_loop_lag_seconds", lag)
+            metrics.set_gauge("event_loop_lag_last_seconds", lag)
+
+    def _watch(self):
+        reported_beat = None
+        while True:
+            time.sleep(self.threshold / 2)
+            beat = self._beat
+            stalled = time.monotonic() - beat
+            if stalled < self.threshold or beat == reported_beat:
+                continue
+            # One incident per stall, captured while the loop is still blocked
+            reported_beat = beat
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            stack = traceback.extract_stack(frame)
+            handler, blocking = _attribute(stack)
+            trace = "".join(traceback.format_list(stack[-12:]))
+            self.incidents[handler] += 1
+            self.recent.append({
+                "time": time.time(),
+                "stalled": stalled,
+                "handler": handler,
+                "blocking": blocking,
+                "stack": trace
+            })
+            metrics.inc("event_loop_blocked_total", handler=handler)
+            logger.warning(f"Event loop blocked for {stalled:.2f}s+ in {handler} at {blocking}:\n{trace}")
+
+    def start(self):
+        """Start monitoring the running event loop (call from inside it)."""
+        self._loop_thread_id = threading.get_ident()
+        self._beat = time.monotonic()
+        self._task = asyncio.create_task(self._heartbeat())
+        threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True).start()
+        logger.info(f"Loop lag monitor started (threshold {self.threshold}s)")
+
+# Shared monitor for the bot's event loop
+loop_monitor = LoopLagMonitor()
@@ -0,0 +1,62 @@
+import logging
+import threading
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# In-process metric registry, shared between the bot loop and the health server thread
+_lock = threading.Lock()
+_counters = {}  # Format: {(name, labels): float}
+_gauges = {}  # Format: {(name, labels): float}
+_summaries = {}  # Format: {(name, labels): {"count": int, "sum": float, "max": float}}
+
+def _key(name: str, labels: dict):
+    return name, tuple(sorted(labels.items()))
+
+def inc(name: str, value: float = 1, **labels):
+    """Increment a counter metric."""
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+def set_gauge(name: str, value: float, **labels):
+    """Set a gauge metric to the given value."""
+    with _lock:
+        _gauges[_key(name, labels)] = value
+
+def observe(name: str, value: float, **labels):
+    """Record an observation (e.g. a duration) into a count/sum/max summary."""
+    key = _key(name, labels)
+    with _lock:
+        summary = _summaries.setdefault(key, {"count": 0, "sum": 0.0, "max": 0.0})
+        summary["count"] += 1
+        summary["sum"] += value
+        summary["max"] = max(summary["max"], value)
+
+def get_value(name: str, **labels):
+    """Return the current value of a counter or gauge, or None if it was never set."""
+    key = _key(name, labels)
+    with _lock:
+        if key in _counters:
+            return _counters[key]
+        return _gauges.get(key)
+
+def _format_labels(labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+def render_text() -> str:
+    """Render all metrics in the Prometheus text exposition format."""
+    lines = []
+    with _lock:
+        for (name, labels), value in sorted(_counters.items()):
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+        for (name, labels), value in sorted(_gauges.items()):
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+        for (name, labels), summary in sorted(_summaries.items()):
+            label_text = _format_labels(labels)
+            lines.append(f"{name}_count{label_text} {summary['count']}")
+            lines.append(f"{name}_sum{label_text} {summary['sum']}")
+            lines.append(f"{name}_max{label_text} {summary['max']}")
+    return "\n".join(lines) + "\n"
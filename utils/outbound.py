@@ -0,0 +1,143 @@
+import logging
+import asyncio
+import contextvars
+import time
+from contextlib import contextmanager
+from pyrogram import Client
+from pyrogram.errors import FloodWait
+from config import (
+    OUTBOUND_GLOBAL_RATE, OUTBOUND_GLOBAL_BURST, OUTBOUND_INTERACTIVE_RESERVE, OUTBOUND_PER_CHAT_RATE,
+    OUTBOUND_PER_CHAT_BURST, OUTBOUND_MAX_FLOODWAIT, OUTBOUND_FLOODWAIT_RETRIES
+)
+from utils import metrics, tracing
+from utils.cache import LRUCache
+from utils.ratelimit import TokenBucket, PriorityTokenBucket
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Priority classes, most urgent first
+INTERACTIVE = 0  # Replies to a user's own command or button press
+APPROVAL = 1  # VCF-ready notifications sent by approvals
+BROADCAST = 2  # Admin broadcasts
+
+PRIORITY_NAMES = {INTERACTIVE: "interactive", APPROVAL: "approval", BROADCAST: "broadcast"}
+
+# Raw API calls that post into a chat and count against Telegram's message limits
+MESSAGE_CALLS = {"SendMessage", "SendMedia", "SendMultiMedia", "EditMessage", "ForwardMessages"}
+
+_priority = contextvars.ContextVar("outbound_priority", default=INTERACTIVE)
+
+@contextmanager
+def outbound_priority(priority: int):
+    """Send every Telegram call made inside this block (and tasks it starts) with `priority`."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+def _target_chat(query):
+    peer = getattr(query, "peer", None) or getattr(query, "to_peer", None)
+    if peer is None:
+        return None
+    for attr in ("user_id", "chat_id", "channel_id"):
+        value = getattr(peer, attr, None)
+        if value is not None:
+            return value
+    return None
+
+class OutboundScheduler:
+    """Coordinates every outbound Telegram call of a client.
+
+    Message-producing calls wait for a per-chat token and then a global token, served in
+    priority order, with a reserve that only interactive replies may use, so a running
+    broadcast cannot starve button presses. FloodWait errors are handled centrally: on a
+    message call the affected chat (or every message, for a call with no target chat) is
+    paused and the call retried; any other call just waits out its own flood and retries.
+    """
+
+    def __init__(self):
+        self.global_bucket = PriorityTokenBucket(OUTBOUND_GLOBAL_RATE, OUTBOUND_GLOBAL_BURST, OUTBOUND_INTERACTIVE_RESERVE)
+        self._chat_buckets = LRUCache(50000, name="outbound_chats")  # Format: {chat_id: TokenBucket}
+        self._paused_until = 0.0
+
+    def _chat_bucket(self, chat_id) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = TokenBucket(OUTBOUND_PER_CHAT_RATE, OUTBOUND_PER_CHAT_BURST)
+            self._chat_buckets.set(chat_id, bucket)
+        return bucket
+
+    async def _admit(self, chat_id, priority: int):
+        if chat_id is not None:
+            bucket = self._chat_bucket(chat_id)
+            while not bucket.try_acquire():
+                await asyncio.sleep(bucket.wait_time())
+        await self.global_bucket.acquire(priority)
+        pause = self._paused_until - time.monotonic()
+        if pause > 0:
+            await asyncio.sleep(pause)
+
+    def _flood(self, name: str, chat_id, seconds: float):
+        metrics.inc("outbound_floodwait_total")
+        if name not in MESSAGE_CALLS:
+            # Lookups such as GetChatMember have their own limits; only the failed call waits
+            return
+        if chat_id is not None:
+            # Drain the chat's bucket so its next call waits out the flood
+            self._chat_bucket(chat_id).drain(seconds)
+        else:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def backlog(self) -> int:
+        """Message-producing calls currently waiting for a global token."""
+        return self.global_bucket.waiting()
+
+    async def invoke(self, invoke, query, *args, **kwargs):
+        """Run `invoke(query, ...)` under the scheduler's limits and FloodWait handling."""
+        name = type(query).__name__
+        chat_id = _target_chat(query) if name in MESSAGE_CALLS else None
+        with tracing.span(f"telegram.{name}", chat_id=chat_id, priority=PRIORITY_NAMES[_priority.get()]):
+            return await self._invoke(invoke, query, name, chat_id, *args, **kwargs)
+
+    async def _invoke(self, invoke, query, name: str, chat_id, *args, **kwargs):
+        priority = _priority.get()
+        # Flood waits are handled here rather than slept on inside Pyrogram
+        kwargs.setdefault("sleep_threshold", 0)
+
+        for attempt in range(OUTBOUND_FLOODWAIT_RETRIES + 1):
+            if name in MESSAGE_CALLS:
+                started = time.perf_counter()
+                await self._admit(chat_id, priority)
+                waited = time.perf_counter() - started
+                metrics.observe("outbound_wait_seconds", waited, priority=PRIORITY_NAMES[priority])
+                current = tracing.current_span()
+                if current is not None:
+                    current.set(wait_ms=round(waited * 1000, 3), attempts=attempt + 1)
+            try:
+                return await invoke(query, *args, **kwargs)
+            except FloodWait as e:
+                seconds = e.value
+                self._flood(name, chat_id, seconds)
+                if seconds > OUTBOUND_MAX_FLOODWAIT or attempt >= OUTBOUND_FLOODWAIT_RETRIES:
+                    raise
+                logger.warning(f"FloodWait of {seconds}s on {name} (chat {chat_id}), retrying after the wait")
+                if name not in MESSAGE_CALLS:
+                    await asyncio.sleep(seconds)
+
+def install_outbound_scheduler(client: Client) -> OutboundScheduler:
+    """Route all of `client`'s API calls through a new OutboundScheduler."""
+    scheduler = OutboundScheduler()
+    original_invoke = client.invoke
+
+    async def invoke(query, *args, **kwargs):
+        return await scheduler.invoke(original_invoke, query, *args, **kwargs)
+
+    client.invoke = invoke
+    client.outbound_scheduler = scheduler
+    logger.info(
+        f"Outbound scheduler installed ({OUTBOUND_GLOBAL_RATE}/s global, "
+        f"{OUTBOUND_PER_CHAT_RATE}/s per chat, reserve {OUTBOUND_INTERACTIVE_RESERVE})"
+    )
+    return scheduler
@@ -0,0 +1,79 @@
+import logging
+import re
+from config import DEFAULT_COUNTRY_CODE
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Precompiled patterns used on every submission
+_SEPARATORS_RE = re.compile(r"[\s\-().\/]")
+_INTERNATIONAL_RE = re.compile(r"^(?:\+|00)(\d{7,15})$")
+_NATIONAL_RE = re.compile(r"^\d{6,15}$")
+
+# Calling code -> (national trunk prefix, valid national significant number lengths)
+COUNTRY_CODES = {
+    "1": ("1", (10,)),          # US / Canada
+    "27": ("0", (9,)),          # South Africa
+    "44": ("0", (10,)),         # United Kingdom
+    "91": ("0", (10,)),         # India
+    "92": ("0", (10,)),         # Pakistan
+    "62": ("0", (9, 10, 11, 12)),  # Indonesia
+    "233": ("0", (9,)),         # Ghana
+    "234": ("0", (10,)),        # Nigeria
+    "250": ("0", (9,)),         # Rwanda
+    "254": ("0", (9,)),         # Kenya
+    "255": ("0", (9,)),         # Tanzania
+    "256": ("0", (9,)),         # Uganda
+    "260": ("0", (9,)),         # Zambia
+    "263": ("0", (9,)),         # Zimbabwe
+    "265": ("0", (9,)),         # Malawi
+}
+
+def _split_country_code(digits: str):
+    """Return (country_code, national_number) for a known calling code prefix, else (None, digits)."""
+    for length in (1, 2, 3):
+        code = digits[:length]
+        if code in COUNTRY_CODES:
+            return code, digits[length:]
+    return None, digits
+
+def _valid_national(country_code: str, national: str) -> bool:
+    return len(national) in COUNTRY_CODES[country_code][1]
+
+def normalize_number(raw: str, default_country_code: str = DEFAULT_COUNTRY_CODE):
+    """Normalize a submitted phone number to canonical E.164 (e.g. +256787123456).
+
+    Numbers without a calling code are interpreted in `default_country_code`.
+    Returns None if the number cannot be normalized.
+    """
+    if not raw:
+        return None
+    cleaned = _SEPARATORS_RE.sub("", raw)
+
+    match = _INTERNATIONAL_RE.match(cleaned)
+    if match:
+        digits = match.group(1)
+        country_code, national = _split_country_code(digits)
+        if country_code is None:
+            # Unknown calling code: accept anything that is a plausible E.164 length
+            return f"+{digits}" if 8 <= len(digits) <= 15 else None
+        # Tolerate a trunk prefix written after the calling code, e.g. +256 0787...
+        trunk = COUNTRY_CODES[country_code][0]
+        if not _valid_national(country_code, national) and national.startswith(trunk):
+            national = national[len(trunk):]
+        return f"+{country_code}{national}" if _valid_national(country_code, national) else None
+
+    if not _NATIONAL_RE.match(cleaned) or default_country_code not in COUNTRY_CODES:
+        return None
+
+    # Calling code written without the leading +, e.g. 256787...
+    if cleaned.startswith(default_country_code):
+        national = cleaned[len(default_country_code):]
+        if _valid_national(default_country_code, national):
+            return f"+{default_country_code}{national}"
+
+    trunk = COUNTRY_CODES[default_country_code][0]
+    national = cleaned[len(trunk):] if cleaned.startswith(trunk) else cleaned
+    if _valid_national(default_country_code, national):
+        return f"+{default_country_code}{national}"
+    return None
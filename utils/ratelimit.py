@@ -0,0 +1,108 @@
+import asyncio
+import heapq
+import itertools
+import time
+
+class TokenBucket:
+    """Token bucket refilled continuously at `rate` tokens per second up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens: float = 1) -> bool:
+        """Take `tokens` if available right now."""
+        self._refill()
+        if self._tokens >= tokens:
+            self._tokens -= tokens
+            return True
+        return False
+
+    def drain(self, seconds: float):
+        """Empty the bucket so that its next token is `seconds` away."""
+        self._refill()
+        self._tokens = -seconds * self.rate
+
+    def wait_time(self, tokens: float = 1) -> float:
+        """Seconds until `tokens` will be available."""
+        self._refill()
+        if self._tokens >= tokens:
+            return 0.0
+        return (tokens - self._tokens) / self.rate
+
+class AsyncTokenBucket(TokenBucket):
+    """Token bucket whose acquire() waits for tokens; waiters are served in arrival order."""
+
+    def __init__(self, rate: float, capacity: float = None):
+        super().__init__(rate, capacity)
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens: float = 1):
+        async with self._lock:
+            while not self.try_acquire(tokens):
+                await asyncio.sleep(self.wait_time(tokens))
+
+class PriorityTokenBucket(TokenBucket):
+    """Async token bucket that serves waiters by priority (lower number first).
+
+    Waiters above priority 0 may only take a token while `reserve` tokens would remain,
+    so bulk traffic always leaves headroom for the most urgent class.
+    """
+
+    def __init__(self, rate: float, capacity: float = None, reserve: float = 0):
+        super().__init__(rate, capacity)
+        self.reserve = min(reserve, max(self.capacity - 1, 0))
+        self._waiters = []  # Heap of (priority, seq, future)
+        self._seq = itertools.count()
+        self._arrival = None
+        self._pump_task = None
+
+    def _required(self, priority: int) -> float:
+        return 1 + (self.reserve if priority > 0 else 0)
+
+    def _take(self, priority: int) -> bool:
+        self._refill()
+        if self._tokens >= self._required(priority):
+            self._tokens -= 1
+            return True
+        return False
+
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self, priority: int = 0):
+        if not self._waiters and self._take(priority):
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        if self._arrival is None:
+            self._arrival = asyncio.Event()
+        self._arrival.set()
+        if self._pump_task is None or self._pump_task.done():
+            self._pump_task = asyncio.create_task(self._pump())
+        await future
+
+    async def _pump(self):
+        while self._waiters:
+            priority, _, future = self._waiters[0]
+            if future.done():
+                # The waiter was cancelled
+                heapq.heappop(self._waiters)
+                continue
+            if self._take(priority):
+                heapq.heappop(self._waiters)
+                future.set_result(None)
+                continue
+            # Sleep until enough tokens, or until a (possibly more urgent) waiter arrives
+            self._arrival.clear()
+            try:
+                await asyncio.wait_for(self._arrival.wait(), timeout=self.wait_time(self._required(priority)))
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,25 @@
+import logging
+import asyncio
+from config import GROUP_COUNTER_RECONCILE_INTERVAL
+from database.groups import get_sharded_active_groups, reconcile_group_counters
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+def reconcile_active_groups() -> int:
+    """Sync the sharded seat counts of every filling group into its group document."""
+    reconciled = 0
+    for group in get_sharded_active_groups():
+        if reconcile_group_counters(group["group_id"], group["generation"]):
+            reconciled += 1
+    return reconciled
+
+async def run_counter_reconcile_loop(interval: int = GROUP_COUNTER_RECONCILE_INTERVAL):
+    """Keep displayed member counts and full status current while counters are sharded."""
+    logger.info(f"Group counter reconciler started (every {interval}s)")
+    while True:
+        try:
+            await asyncio.to_thread(reconcile_active_groups)
+        except Exception as e:
+            logger.error(f"Group counter reconciliation failed: {e}", exc_info=True)
+        await asyncio.sleep(interval)
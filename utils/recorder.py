@@ -0,0 +1,123 @@
+import logging
+import gzip
+import hashlib
+import hmac
+import json
+import os
+import re
+import time
+from datetime import datetime
+from config import ADMIN_IDS, RECORD_UPDATES, RECORD_DIR, RECORD_SALT
+from utils.router import callback_router, callback_data
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Line labels of the submission format, kept so replayed submissions still parse
+KEEP_LABELS = {"Name", "Number"}
+# Callback parameters that carry personal data
+PRIVATE_PARAMS = {"name", "number"}
+# Country codes are kept so replayed numbers still normalize
+KEPT_PREFIX_DIGITS = 3
+
+_digits = re.compile(r"\+?\d+")
+_letters = re.compile(r"[^\W\d_]")
+_label = re.compile(r"^(\w+): (.*)$")
+
+class UpdateRecorder:
+    """Appends anonymized incoming updates to a gzip-compressed JSONL file.
+
+    Each record holds the arrival offset, the kind of update, an anonymized user id
+    (admins are only flagged) and the command text or callback data with names and
+    numbers masked. User ids and digits are replaced with keyed hashes, so one user or
+    number maps to the same value throughout a recording. Replay recordings with
+    benchmarks/replay_updates.py.
+    """
+
+    def __init__(self, directory: str = RECORD_DIR, salt: str = RECORD_SALT, enabled: bool = RECORD_UPDATES):
+        self.enabled = enabled
+        self.directory = directory
+        self._key = (salt or os.urandom(16).hex()).encode()
+        self._file = None
+        self._started = None
+        self._since_flush = 0
+
+    def _hash(self, value: str) -> int:
+        return int(hmac.new(self._key, value.encode(), hashlib.sha256).hexdigest()[:15], 16)
+
+    def anonymize_user(self, user_id: int) -> int:
+        return 1_000_000_000 + self._hash(f"user:{user_id}") % 8_999_999_999
+
+    def _mask_digits(self, match) -> str:
+        run = match.group(0)
+        keep = KEPT_PREFIX_DIGITS + 1 if run.startswith("+") else 0
+        tail = run[keep:]
+        digits = str(self._hash(f"digits:{tail}")).zfill(len(tail))[-len(tail):] if tail else ""
+        return run[:keep] + digits
+
+    def anonymize_text(self, text: str) -> str:
+        """Mask letters and hash digits, keeping commands, line layout and submission labels."""
+        if text.startswith("/"):
+            return text
+        lines = []
+        for line in text.split("\n"):
+            prefix = ""
+            match = _label.match(line)
+            if match and match.group(1) in KEEP_LABELS:
+                prefix, line = f"{match.group(1)}: ", match.group(2)
+            line = _digits.sub(self._mask_digits, line)
+            lines.append(prefix + _letters.sub(lambda m: "X" if m.group(0).isupper() else "x", line))
+        return "\n".join(lines)
+
+    def anonymize_data(self, data: str):
+        """Callback data with private parameters masked, in the router format, or None if unroutable."""
+        route, args = callback_router.resolve(data)
+        if route is None:
+            return None
+        args = [
+            self.anonymize_text(arg) if param in PRIVATE_PARAMS else arg
+            for param, arg in zip(route.params, args)
+        ]
+        return callback_data(route.action, *args)
+
+    def _open(self):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"updates-{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl.gz")
+        self._file = gzip.open(path, "at", encoding="utf-8")
+        self._started = time.monotonic()
+        logger.info(f"Recording anonymized updates to {path}")
+
+    def record(self, kind: str, user_id: int, text: str = None, data: str = None):
+        if not self.enabled:
+            return
+        try:
+            if self._file is None:
+                self._open()
+            admin = user_id in ADMIN_IDS
+            entry = {
+                "t": round(time.monotonic() - self._started, 3),
+                "kind": kind,
+                "user": None if admin else self.anonymize_user(user_id),
+                "admin": admin
+            }
+            if text is not None:
+                entry["text"] = self.anonymize_text(text)
+            if data is not None:
+                entry["data"] = self.anonymize_data(data)
+            self._file.write(json.dumps(entry) + "\n")
+            self._since_flush += 1
+            if self._since_flush >= 100:
+                # A sync flush keeps the file readable up to here even if the process dies
+                self._file.flush()
+                self._since_flush = 0
+        except Exception as e:
+            logger.error(f"Failed to record {kind} update, disabling the recorder: {e}")
+            self.enabled = False
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+# Shared recorder; a no-op unless RECORD_UPDATES is set
+update_recorder = UpdateRecorder()
@@ -0,0 +1,71 @@
+import logging
+import re
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+def callback_data(action: str, *args) -> str:
+    """Build callback data in the "action:arg1:arg2" format understood by CallbackRouter."""
+    return ":".join([action, *(str(arg) for arg in args)])
+
+class Route:
+    def __init__(self, action: str, handler, params: tuple, admin_only: bool, sheddable: bool = False):
+        self.action = action
+        self.handler = handler
+        self.params = params
+        self.admin_only = admin_only
+        self.sheddable = sheddable
+
+class CallbackRouter:
+    """Dispatch callback queries by action name through dict lookups.
+
+    New buttons carry "action:arg1:arg2"; the last parameter absorbs any further colons,
+    so free text can go last. Buttons sent before the router existed used underscore
+    formats such as "select_group_100"; those are matched by per-route legacy regexes,
+    indexed by their first underscore-separated word so a tap only tries the few legacy
+    patterns sharing its prefix.
+    """
+
+    def __init__(self):
+        self._routes = {}  # Format: {action: Route}
+        self._legacy = {}  # Format: {first word: [(compiled regex, Route)]}
+
+    def route(self, action: str, params: tuple = (), legacy: str = None, admin_only: bool = False, sheddable: bool = False):
+        """Register the decorated coroutine `handler(client, callback_query, *args)` for `action`.
+
+        `legacy` is a regex with named groups (one per param) for the pre-router data format.
+        `sheddable` routes are informational and may be refused while the bot is overloaded.
+        """
+        def decorator(handler):
+            route = Route(action, handler, tuple(params), admin_only, sheddable)
+            self._routes[action] = route
+            if legacy:
+                prefix = legacy.lstrip("^").split("_", 1)[0]
+                self._legacy.setdefault(prefix, []).append((re.compile(legacy), route))
+            return handler
+        return decorator
+
+    def resolve(self, data: str):
+        """Parse callback data once into (route, args), or (None, None) if nothing matches."""
+        action, sep, rest = data.partition(":")
+        route = self._routes.get(action)
+        if route is not None:
+            if not sep:
+                return (route, []) if not route.params else (None, None)
+            args = rest.split(":", len(route.params) - 1) if route.params else []
+            if len(args) != len(route.params):
+                return None, None
+            return route, args
+
+        for pattern, route in self._legacy.get(data.split("_", 1)[0], ()):
+            match = pattern.match(data)
+            if match:
+                return route, [match.group(param) for param in route.params]
+        return None, None
+
+    def actions(self):
+        return list(self._routes)
+
+# Shared router; handler modules register their callback actions on it
+callback_router = CallbackRouter()
+callback_route = callback_router.route
@@ -0,0 +1,152 @@
+import asyncio
+import logging
+from collections import Counter
+from pyrogram import Client, filters
+from pyrogram.errors import PeerIdInvalid, UserIsBlocked
+from pyrogram.handlers import MessageHandler
+from config import API_ID, API_HASH, SENDER_BOT_TOKENS
+from database.senders import mark_sender_reachable, mark_sender_unreachable, get_reachable_senders, count_reachable_users
+from database.users import total_users_count
+from utils import metrics
+from utils.outbound import install_outbound_scheduler
+from utils.ui import SENDER_START_TEXT
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Errors meaning this sender cannot message the user (they never started it, or blocked it)
+UNREACHABLE_ERRORS = (PeerIdInvalid, UserIsBlocked)
+
+class SenderPool:
+    """Extra bot sessions that spread mass sends over several Telegram rate budgets.
+
+    Every sender has its own outbound scheduler, so its flood limits are independent of
+    the main bot's. A bot can only message users who started it, so each sender records
+    the users who send it /start in Mongo. Every recipient goes to the least busy bot that
+    can reach them, senders ahead of the main bot, which alone carries everyone the
+    senders cannot reach. A sender that turns out to be blocked is dropped for that user
+    and the message falls back to the main bot.
+    """
+
+    def __init__(self, tokens=()):
+        self.tokens = list(tokens)
+        self.clients = []
+        self.sender_ids = []  # Telegram id of each started sender, parallel to clients
+        self._inflight = Counter()  # Format: {client: sends in progress}
+
+    @property
+    def size(self) -> int:
+        """Number of sending sessions including the main bot."""
+        return 1 + len(self.clients)
+
+    async def start(self):
+        for index, token in enumerate(self.tokens):
+            client = Client(
+                f"sender_{index}",
+                api_id=API_ID,
+                api_hash=API_HASH,
+                bot_token=token
+            )
+            # Senders only answer /start, which is what lets them message the user
+            client.add_handler(MessageHandler(self._on_start, filters.command("start") & filters.private))
+            install_outbound_scheduler(client)
+            try:
+                await client.start()
+            except Exception as e:
+                logger.error(f"Failed to start sender bot {index}, continuing without it: {e}")
+                continue
+            self.clients.append(client)
+            self.sender_ids.append(client.me.id)
+        if self.clients:
+            logger.info(f"Sender pool started with {len(self.clients)} extra bot(s)")
+
+    async def stop(self):
+        for client in self.clients:
+            try:
+                await client.stop()
+            except Exception as e:
+                logger.warning(f"Failed to stop sender bot {client.name}: {e}")
+        self.clients = []
+        self.sender_ids = []
+
+    async def _on_start(self, client: Client, message):
+        await asyncio.to_thread(mark_sender_reachable, client.me.id, message.from_user.id)
+        try:
+            await message.reply_text(SENDER_START_TEXT)
+        except Exception as e:
+            logger.warning(f"Failed to answer /start on sender bot {client.name}: {e}")
+
+    async def capacity(self) -> float:
+        """How many bots' send budgets a mass send to all users can use.
+
+        The main bot must reach everyone no sender can, so it is the bottleneck once those
+        users outnumber its even share: with a users in total and u of them unreachable by
+        any sender, at most min(size, a / u) budgets are used.
+        """
+        if not self.clients:
+            return 1
+        total = await asyncio.to_thread(total_users_count)
+        reachable = await asyncio.to_thread(count_reachable_users)
+        if not total:
+            return 1
+        return max(1.0, min(self.size, total / max(1, total - reachable)))
+
+    async def reachable(self, chat_ids: list) -> dict:
+        """The sender ids that can reach each chat, as {chat_id: set}; load once per batch and pass to deliver()."""
+        if not self.clients or not chat_ids:
+            return {}
+        return await asyncio.to_thread(get_reachable_senders, chat_ids)
+
+    def pick(self, chat_id: int, primary: Client, reachable=frozenset()):
+        """The bot a chat is assigned to, as (sender_id, client); sender_id is None for the main bot.
+
+        Picks the bot with the fewest sends in progress among the main bot and the senders
+        that can reach the chat; ties go to senders, spread by chat_id.
+        """
+        options = [
+            (sender_id, client)
+            for sender_id, client in zip(self.sender_ids, self.clients)
+            if sender_id in reachable
+        ]
+        if not options:
+            return None, primary
+        options.append((None, primary))
+        start = chat_id % len(options)
+        return min(
+            options[start:] + options[:start],
+            key=lambda option: (self._inflight[option[1]], option[0] is None)
+        )
+
+    async def _send(self, client: Client, send):
+        self._inflight[client] += 1
+        try:
+            return await send(client)
+        finally:
+            self._inflight[client] -= 1
+            if not self._inflight[client]:
+                del self._inflight[client]
+
+    async def deliver(self, chat_id: int, send, primary: Client, reachable=None):
+        """Run `send(client)` on the bot pick() assigns `chat_id` to, falling back to `primary`.
+
+        `reachable` is the chat's entry from reachable(); it is looked up here if omitted.
+        """
+        if self.clients:
+            if reachable is None:
+                reachable = (await self.reachable([chat_id])).get(chat_id, ())
+            sender_id, client = self.pick(chat_id, primary, reachable)
+            if sender_id is not None:
+                try:
+                    result = await self._send(client, send)
+                    metrics.inc("sender_messages_total", sender=client.name)
+                    return result
+                except UNREACHABLE_ERRORS as e:
+                    await asyncio.to_thread(mark_sender_unreachable, sender_id, chat_id)
+                    metrics.inc("sender_fallbacks_total", sender=client.name)
+                    logger.debug(f"Sender {client.name} cannot reach chat {chat_id} ({type(e).__name__}), using the main bot")
+        result = await self._send(primary, send)
+        metrics.inc("sender_messages_total", sender="main")
+        return result
+
+# Shared pool; empty (main bot only) unless SENDER_BOT_TOKENS is set
+sender_pool = SenderPool(SENDER_BOT_TOKENS)
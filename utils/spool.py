@@ -0,0 +1,135 @@
+import logging
+import asyncio
+import os
+import tempfile
+import time
+from config import TEMP_VCF_PATH, TEMP_VCF_QUOTA_MB, TEMP_VCF_CLEANUP_INTERVAL, DELETE_DELAY_HOURS
+from utils import metrics
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+class SpoolManager:
+    """Own a spool directory: atomic writes, a total-size quota and a retention window."""
+
+    def __init__(self, path: str, quota_bytes: int, retention_seconds: int, suffix: str = ".vcf"):
+        self.path = path
+        self.quota_bytes = quota_bytes
+        self.retention_seconds = retention_seconds
+        self.suffix = suffix
+        os.makedirs(self.path, exist_ok=True)
+
+    def _is_spool_file(self, name: str) -> bool:
+        # Only touch files we create; placeholders such as XPTOOLS are left alone
+        return name.endswith(self.suffix) or name.endswith(".tmp")
+
+    def _scan(self):
+        """Return [(mtime, size, path)] for spool files, oldest first."""
+        entries = []
+        with os.scandir(self.path) as it:
+            for entry in it:
+                if not entry.is_file() or not self._is_spool_file(entry.name):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        entries.sort()
+        return entries
+
+    def _remove(self, path: str, reason: str) -> int:
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+            metrics.inc("vcf_spool_evictions_total", reason=reason)
+            logger.debug(f"Removed spool file {path} ({reason})")
+            return size
+        except FileNotFoundError:
+            return 0
+        except OSError as e:
+            logger.warning(f"Failed to remove spool file {path}: {e}")
+            return 0
+
+    def _publish(self, entries):
+        metrics.set_gauge("vcf_spool_files", len(entries))
+        metrics.set_gauge("vcf_spool_bytes", sum(size for _, size, _ in entries))
+        metrics.set_gauge("vcf_spool_quota_bytes", self.quota_bytes)
+
+    def _make_room(self, needed: int):
+        """Evict the oldest files until `needed` extra bytes fit in the quota."""
+        entries = self._scan()
+        used = sum(size for _, size, _ in entries)
+        while entries and used + needed > self.quota_bytes:
+            _, size, path = entries.pop(0)
+            used -= self._remove(path, "quota")
+        return used + needed <= self.quota_bytes
+
+    def write(self, file_name: str, data) -> str:
+        """Atomically write `data` to `file_name` in the spool and return its path.
+
+        The content is written to a temp file in the same directory and renamed into
+        place, so readers never observe a partially written VCF. Returns None if the
+        file cannot fit in the quota or the write fails.
+        """
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        if len(data) > self.quota_bytes or not self._make_room(len(data)):
+            logger.error(f"Spool quota of {self.quota_bytes} bytes exceeded, refusing to write {file_name}")
+            metrics.inc("vcf_spool_rejected_total")
+            return None
+
+        final_path = os.path.join(self.path, file_name)
+        fd, tmp_path = tempfile.mkstemp(dir=self.path, prefix=".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, final_path)
+        except OSError as e:
+            logger.error(f"Failed to write spool file {final_path}: {e}")
+            self._remove(tmp_path, "failed_write")
+            return None
+
+        metrics.inc("vcf_spool_writes_total")
+        self._publish(self._scan())
+        return final_path
+
+    def cleanup(self):
+        """Delete files older than the retention window, then enforce the quota."""
+        cutoff = time.time() - self.retention_seconds
+        expired = 0
+        for mtime, _, path in self._scan():
+            if mtime < cutoff:
+                self._remove(path, "retention")
+                expired += 1
+        self._make_room(0)
+        entries = self._scan()
+        self._publish(entries)
+        if expired:
+            logger.info(f"Spool cleanup removed {expired} expired files from {self.path}")
+        return {"files": len(entries), "bytes": sum(size for _, size, _ in entries)}
+
+    def stats(self):
+        """Return the current file count and disk usage of the spool."""
+        entries = self._scan()
+        self._publish(entries)
+        return {"files": len(entries), "bytes": sum(size for _, size, _ in entries)}
+
+    async def run_cleanup_loop(self, interval: int = TEMP_VCF_CLEANUP_INTERVAL):
+        """Periodically run cleanup off the event loop."""
+        logger.info(f"Spool cleanup loop started for {self.path} (every {interval}s)")
+        while True:
+            try:
+                await asyncio.to_thread(self.cleanup)
+            except Exception as e:
+                logger.error(f"Spool cleanup failed for {self.path}: {e}", exc_info=True)
+            await asyncio.sleep(interval)
+
+# Shared spool for generated VCF files
+vcf_spool = SpoolManager(
+    TEMP_VCF_PATH,
+    quota_bytes=TEMP_VCF_QUOTA_MB * 1024 * 1024,
+    retention_seconds=DELETE_DELAY_HOURS * 3600
+)
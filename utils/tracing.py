@@ -0,0 +1,174 @@
+import logging
+import contextvars
+import json
+import os
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pymongo.monitoring import CommandListener
+from config import TRACING_ENABLED, TRACE_SAMPLE_RATE, TRACE_DIR
+from utils import metrics
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# The span the current task is inside; None when the update is not traced
+_current = contextvars.ContextVar("trace_span", default=None)
+
+def _new_id() -> str:
+    return os.urandom(8).hex()
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "attrs", "error", "start", "_started")
+
+    def __init__(self, name: str, parent: "Span" = None, **attrs):
+        self.trace_id = parent.trace_id if parent else _new_id()
+        self.span_id = _new_id()
+        self.parent_id = parent.span_id if parent else None
+        self.name = name
+        self.attrs = attrs
+        self.error = None
+        self.start = time.time()
+        self._started = time.perf_counter()
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def finish(self, duration: float = None):
+        """Export the span; `duration` (seconds) overrides the measured one."""
+        if duration is None:
+            duration = time.perf_counter() - self._started
+        exporter.export({
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start,
+            "duration_ms": round(duration * 1000, 3),
+            "attrs": self.attrs,
+            "error": self.error
+        })
+
+class JSONLExporter:
+    """Writes finished spans to daily JSONL files from a background thread.
+
+    Spans are queued without blocking; if the writer falls behind they are dropped and
+    counted rather than slowing the bot down.
+    """
+
+    def __init__(self, directory: str, maxsize: int = 10000):
+        self.directory = directory
+        self._queue = queue.Queue(maxsize)
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def export(self, record: dict):
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+                    self._thread.start()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            metrics.inc("trace_spans_dropped_total")
+
+    def _run(self):
+        os.makedirs(self.directory, exist_ok=True)
+        while True:
+            records = [self._queue.get()]
+            while len(records) < 500:
+                try:
+                    records.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            path = os.path.join(self.directory, f"spans-{datetime.now().strftime('%Y%m%d')}.jsonl")
+            try:
+                with open(path, "a", encoding="utf-8") as f:
+                    for record in records:
+                        f.write(json.dumps(record, default=str) + "\n")
+                metrics.inc("trace_spans_exported_total", len(records))
+            except OSError as e:
+                logger.error(f"Failed to write {len(records)} spans to {path}: {e}")
+
+exporter = JSONLExporter(TRACE_DIR)
+
+def current_span():
+    return _current.get()
+
+def begin_update(name: str, **attrs):
+    """Start the root span of an update in the current task, subject to sampling."""
+    if not TRACING_ENABLED or random.random() >= TRACE_SAMPLE_RATE:
+        _current.set(None)
+        return None
+    root = Span(name, **attrs)
+    _current.set(root)
+    return root
+
+def finish_update():
+    """Finish the current task's update span, if one is open."""
+    root = _current.get()
+    if root is not None and root.parent_id is None:
+        root.finish()
+    _current.set(None)
+
+@contextmanager
+def span(name: str, **attrs):
+    """Record a child span of the current span; a no-op when the update is not traced."""
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+    child = Span(name, parent, **attrs)
+    token = _current.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current.reset(token)
+        child.finish()
+
+class TracingCommandListener(CommandListener):
+    """Record each MongoDB command as a span of the update that issued it.
+
+    Command events fire on the calling thread, and asyncio.to_thread copies context, so
+    the update's span is visible here even for queries run in worker threads.
+    """
+
+    def __init__(self):
+        self._pending = {}  # Format: {(request_id, connection_id): Span}
+        self._lock = threading.Lock()
+
+    def started(self, event):
+        parent = _current.get()
+        if parent is None:
+            return
+        collection = event.command.get(event.command_name)
+        command = Span(
+            f"mongo.{event.command_name}",
+            parent,
+            db=event.database_name,
+            collection=collection if isinstance(collection, str) else None
+        )
+        with self._lock:
+            self._pending[(event.request_id, event.connection_id)] = command
+
+    def _pop(self, event):
+        with self._lock:
+            return self._pending.pop((event.request_id, event.connection_id), None)
+
+    def succeeded(self, event):
+        command = self._pop(event)
+        if command is not None:
+            command.finish(event.duration_micros / 1e6)
+
+    def failed(self, event):
+        command = self._pop(event)
+        if command is not None:
+            command.error = str(event.failure)
+            command.finish(event.duration_micros / 1e6)
@@ -0,0 +1,164 @@
+from functools import lru_cache
+from pyrogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+from config import (
+    DOWNLOAD_CHANNEL, REQUIRED_CHANNELS, SUPPORT_GROUP_URL, SOURCE_CODE_URL, BOT_NAME, BOT_USERNAME,
+    OWNER_USERNAME, TUTORIAL_VIDEO_URL
+)
+from utils.router import callback_data
+
+# Keyboards and pages are built once at import instead of for every update. Pyrogram
+# only reads a markup when serializing a request, so one instance can be sent any
+# number of times.
+
+# ───── Buttons ───── #
+BACK_HOME_BUTTON = InlineKeyboardButton("🏠 Back to Home", callback_data="back_to_home")
+CANCEL_BUTTON = InlineKeyboardButton("❌ Cancel", callback_data="back_to_home")
+ADD_NUMBER_BUTTON = InlineKeyboardButton("➕ Add Number", callback_data="submit_numbers")
+SUBMIT_ANOTHER_BUTTON = InlineKeyboardButton("📤 Submit to Another Group", callback_data="submit_numbers")
+BACK_TO_SELECT_BUTTON = InlineKeyboardButton("⏮️ Back To Select Group", callback_data="submit_numbers")
+TRY_AGAIN_BUTTON = InlineKeyboardButton("📤 Try Again", callback_data="submit_numbers")
+CHECK_SUBSCRIPTION_BUTTON = InlineKeyboardButton("✅ Check Subscription", callback_data="check_subscription")
+
+# ───── Static markups ───── #
+HOME_MARKUP = InlineKeyboardMarkup([
+    [
+        ADD_NUMBER_BUTTON,
+        InlineKeyboardButton("📁 My Submissions", callback_data="my_submissions")
+    ],
+    [
+        InlineKeyboardButton("💡 Tutorial", callback_data="tutorial"),
+        InlineKeyboardButton("ℹ️ About Bot", callback_data="about_bot")
+    ]
+])
+BACK_HOME_MARKUP = InlineKeyboardMarkup([[BACK_HOME_BUTTON]])
+HOME_RETRY_MARKUP = InlineKeyboardMarkup([[InlineKeyboardButton("🏠 Try Again", callback_data="back_to_home")]])
+CANCEL_MARKUP = InlineKeyboardMarkup([[CANCEL_BUTTON]])
+ADD_OR_HOME_MARKUP = InlineKeyboardMarkup([[ADD_NUMBER_BUTTON, BACK_HOME_BUTTON]])
+SUBMIT_ANOTHER_MARKUP = InlineKeyboardMarkup([[SUBMIT_ANOTHER_BUTTON, BACK_HOME_BUTTON]])
+SELECT_GROUP_MARKUP = InlineKeyboardMarkup([[BACK_TO_SELECT_BUTTON], [BACK_HOME_BUTTON]])
+TRY_AGAIN_MARKUP = InlineKeyboardMarkup([[TRY_AGAIN_BUTTON], [BACK_HOME_BUTTON]])
+VCF_READY_MARKUP = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("📥 Download VCF", url=DOWNLOAD_CHANNEL["url"]),
+        SUBMIT_ANOTHER_BUTTON
+    ],
+    [BACK_HOME_BUTTON]
+])
+SUBSCRIBE_MARKUP = InlineKeyboardMarkup(
+    [[InlineKeyboardButton(f"Join {channel['name']}", url=channel["url"])] for channel in REQUIRED_CHANNELS]
+    + [[CHECK_SUBSCRIPTION_BUTTON]]
+)
+ABOUT_MARKUP = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("👥 Support Group", url=SUPPORT_GROUP_URL),
+        InlineKeyboardButton("⚙️ Source Code", url=SOURCE_CODE_URL)
+    ],
+    [ADD_NUMBER_BUTTON, BACK_HOME_BUTTON]
+])
+TUTORIAL_MARKUP = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("🎥 Watch Tutorial", url=TUTORIAL_VIDEO_URL),
+        ADD_NUMBER_BUTTON
+    ],
+    [BACK_HOME_BUTTON]
+])
+POLICY_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("📢 Main Channel", url=REQUIRED_CHANNELS[0]["url"])],
+    [InlineKeyboardButton("📁 Download Channel", url=DOWNLOAD_CHANNEL["url"])],
+    [BACK_HOME_BUTTON]
+])
+
+# ───── Static pages ───── #
+_channel_list = "\n".join(f"- {channel['name']}" for channel in REQUIRED_CHANNELS)
+SUBSCRIBE_TEXT = (
+    "📢 Please join our channel(s) to use the bot:\n\n"
+    + _channel_list
+    + "\n\nClick the button(s) below to join, then press 'Check Subscription'."
+)
+NOT_SUBSCRIBED_TEXT = (
+    "❌ You haven't joined all required channels.\n\n"
+    + _channel_list
+    + "\n\nPlease join and try again."
+)
+SUBMISSION_FORMAT_TEXT = (
+    "📝 Please send your name and phone number in this format:\n"
+    "Name: John Doe\n"
+    "Number: +256787xxxxxx"
+)
+ABOUT_TEXT = (
+    "<b>⍟───[ ᴍʏ ᴅᴇᴛᴀɪʟꜱ ]───⍟</b>\n\n"
+    "<blockquote>"
+    f"‣ ᴍʏ ɴᴀᴍᴇ : <a href=\"https://t.me/{BOT_USERNAME}\">{BOT_NAME}</a> 🔍\n"
+    "‣ ᴍʏ ʙᴇsᴛ ғʀɪᴇɴᴅ : <a href=\"tg://settings\">ᴛʜɪs ᴘᴇʀsᴏɴ</a>\n"
+    f"‣ ᴅᴇᴠᴇʟᴏᴘᴇʀ : <a href=\"https://t.me/{OWNER_USERNAME}\">ᴏᴡɴᴇʀ</a>\n"
+    "‣ ʟɪʙʀᴀʀʏ : <a href=\"https://docs.pyrogram.org/\">ᴘʏʀᴏɢʀᴀᴍ</a>\n"
+    "‣ ʟᴀɴɢᴜᴀɢᴇ : <a href=\"https://www.python.org/download/releases/3.0/\">ᴘʏᴛʜᴏɴ 3</a>\n"
+    "‣ ᴅᴀᴛᴀʙᴀsᴇ : <a href=\"https://www.mongodb.com/\">ᴍᴏɴɢᴏ ᴅʙ</a>\n"
+    "‣ ʙᴏᴛ sᴇʀᴠᴇʀ : <a href=\"https://heroku.com/\">ʜᴇʀᴏᴋᴜ</a>\n"
+    "‣ ʙᴜɪʟᴅ sᴛᴀᴛᴜs : <a href=\"#\">ᴠ1.0 [sᴛᴀʙʟᴇ]</a>"
+    "</blockquote>"
+)
+TUTORIAL_TEXT = (
+    "<b>⍟───[ ᴛᴜᴛᴏʀɪᴀʟ ]───⍟</b>\n\n"
+    "<blockquote>"
+    "‣ sᴛᴇᴘ 1 : Click 'Add Number' to submit your WhatsApp number.\n"
+    "‣ sᴛᴇᴘ 2 : Join an active VCF group to share your number.\n"
+    "‣ sᴛᴇᴘ 3 : Wait for the group to be approved by admins.\n"
+    f"‣ sᴛᴇᴘ 4 : Download the VCF file from <a href=\"{DOWNLOAD_CHANNEL['url']}\">{DOWNLOAD_CHANNEL['name']}</a>.\n"
+    "‣ sᴛᴇᴘ 5 : Import the VCF to your contacts to boost your WhatsApp Status views!"
+    "</blockquote>"
+)
+POLICY_TEXT = (
+    "<b>📜 Terms and Conditions for WhatsApp Status View Increaser Bot</b>\n\n"
+    "<blockquote>1. <b>Purpose</b>: This bot allows you to increase your WhatsApp status views by joining VCF (Virtual Contact File) groups. By submitting your name and phone number, you agree to share your contact details with other group members to enhance status visibility.</blockquote>\n"
+    "<blockquote>2. <b>Channel Membership</b>: You must join our required channels to use the bot. Failure to remain subscribed may restrict access to features. See buttons below for channels.</blockquote>\n"
+    "<blockquote>3. <b>Accurate Submissions</b>: Provide accurate and valid name and phone number details in the requested format. Submissions with incorrect or fraudulent information may be rejected.</blockquote>\n"
+    "<blockquote>4. <b>Data Usage</b>: Your submitted phone number and name are stored temporarily in our database and included in a VCF file when the group is full. After the VCF file is generated and approved (typically within 24 hours), your data is automatically deleted from our database.</blockquote>\n"
+    "<blockquote>5. <b>Prohibited Actions</b>: Do not use the bot for spam, harassment, or any illegal activities. Do not download VCF files for groups you did not join, as this violates user privacy.</blockquote>\n"
+    "<blockquote>6. <b>Liability</b>: The bot is not responsible for how other users utilize the shared VCF files. Use the bot at your own risk. We do not guarantee specific increases in status views.</blockquote>\n"
+    "<blockquote>7. <b>Changes to Terms</b>: These terms may be updated. Continued use of the bot implies acceptance of the updated terms.</blockquote>\n\n"
+    "By using this bot, you agree to these terms. For questions, contact our support team via the main channel below."
+)
+
+# ───── Dynamic page templates ───── #
+GROUP_INFO_TEMPLATE = (
+    "📦 Group: {limit} Users VCF\n"
+    "👥 Current Members: {current_users}/{limit}\n"
+    "📅 Status: {status}\n\n"
+    "ℹ️ Once this group is full, the admin will approve it and share the VCF file on our download channel."
+)
+GROUP_FULL_TEMPLATE = (
+    "❌ Group {limit} Users VCF is full ({current_users}/{limit}).\n"
+    "⏳ Awaiting admin approval. You'll be notified when the VCF file is ready in " + DOWNLOAD_CHANNEL["name"] + "."
+)
+VCF_READY_TEMPLATE = (
+    "🎉 The {limit} Users VCF group is approved!\n"
+    "📥 Download the VCF file from " + DOWNLOAD_CHANNEL["name"] + " now!"
+)
+SUBMISSION_ENTRY_TEMPLATE = "Group: {limit} Users VCF\nStatus: {status}\nMembers: {current_users}/{limit}\n\n"
+SUBMISSION_DROPPED_TEMPLATE = (
+    "⚠️ Your submission of {number} to group {group_id} could not be saved: "
+    "you or this number had already been submitted to it. Please choose a group again."
+)
+SENDER_START_TEXT = (
+    "🔔 You'll also get your VCF notifications from this bot now.\n"
+    f"👉 Submit numbers and browse groups with @{BOT_USERNAME}."
+)
+SUBMISSION_STATUS = {"approved": "✅ Approved", "full": "⏳ Full, Awaiting Approval"}
+
+# ───── Cached dynamic markups ───── #
+@lru_cache(maxsize=1024)
+def group_info_markup(group_id: str) -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup([
+        [InlineKeyboardButton("📤 Submit My Number", callback_data=callback_data("submit_my_number", group_id))],
+        [BACK_TO_SELECT_BUTTON],
+        [BACK_HOME_BUTTON]
+    ])
+
+@lru_cache(maxsize=64)
+def group_select_markup(limits: tuple) -> InlineKeyboardMarkup:
+    """Group pool buttons for the given limits; pass a tuple so it can be cached."""
+    return InlineKeyboardMarkup(
+        [[InlineKeyboardButton(f"👥 {limit} VCF GROUP 👥", callback_data=callback_data("select_group", limit))] for limit in limits]
+        + [[BACK_HOME_BUTTON]]
+    )
@@ -0,0 +1,121 @@
+import logging
+import asyncio
+import contextvars
+import time
+from pyrogram import Client
+from config import ADMIN_IDS, ADMIN_WORKERS, UPDATE_QUEUE_SIZE
+from utils import metrics, tracing
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Set in admin worker tasks so UpdateQueue.get() serves them from the admin lane only
+_admin_lane = contextvars.ContextVar("admin_lane", default=False)
+
+def _sender_id(update):
+    """User id behind a raw update, if it has one."""
+    user_id = getattr(update, "user_id", None)  # Callback queries
+    if user_id is not None:
+        return user_id
+    message = getattr(update, "message", None)
+    peer = getattr(message, "from_id", None) or getattr(message, "peer_id", None)
+    return getattr(peer, "user_id", None)
+
+class UpdateQueue:
+    """Drop-in replacement for the dispatcher's updates queue with two lanes.
+
+    Updates from admins go to an unbounded admin lane served by dedicated workers (and
+    by user workers between user updates), so admin commands stay responsive during user
+    bursts. The user lane holds at most `maxsize` updates; beyond that new updates are
+    dropped and counted, which bounds memory when Telegram replays a backlog.
+    """
+
+    def __init__(self, maxsize: int = UPDATE_QUEUE_SIZE, admin_ids=ADMIN_IDS):
+        self.maxsize = maxsize
+        self.admin_ids = set(admin_ids)
+        self._user = asyncio.Queue()
+        self._admin = asyncio.Queue()
+        self._admin_workers = 0
+        self._stopping = False
+
+    def add_admin_workers(self, count: int):
+        """Register workers that only read the admin lane, so shutdown sends them a sentinel too."""
+        self._admin_workers += count
+        self._stopping = False
+
+    def qsize(self) -> int:
+        return self._user.qsize() + self._admin.qsize()
+
+    def put_nowait(self, packet):
+        if packet is None:
+            # Worker shutdown sentinel from Dispatcher.stop(); never dropped. It sends one per user
+            # worker, so the first also queues one per admin worker behind the pending admin updates
+            if not self._stopping:
+                self._stopping = True
+                for _ in range(self._admin_workers):
+                    self._admin.put_nowait(None)
+                self._admin_workers = 0
+            self._user.put_nowait(None)
+            return
+        if _sender_id(packet[0]) in self.admin_ids:
+            self._admin.put_nowait((time.monotonic(), packet))
+            metrics.set_gauge("update_queue_depth", self._admin.qsize(), lane="admin")
+            return
+        if self._user.qsize() >= self.maxsize:
+            metrics.inc("updates_dropped_total")
+            logger.warning(f"Update queue full ({self.maxsize}), dropping {type(packet[0]).__name__}")
+            return
+        self._user.put_nowait((time.monotonic(), packet))
+        metrics.set_gauge("update_queue_depth", self._user.qsize(), lane="user")
+
+    async def get(self):
+        # A worker asks for its next update once the previous one is fully handled
+        tracing.finish_update()
+        if _admin_lane.get():
+            lane, item = "admin", await self._admin.get()
+        elif not self._stopping and not self._admin.empty():
+            lane, item = "admin", self._admin.get_nowait()
+        else:
+            lane, item = "user", await self._user.get()
+        if item is None:
+            return None
+        enqueued_at, packet = item
+        waited = time.monotonic() - enqueued_at
+        metrics.observe("update_queue_wait_seconds", waited, lane=lane)
+        update = packet[0]
+        tracing.begin_update(
+            type(update).__name__,
+            user_id=_sender_id(update),
+            lane=lane,
+            queue_wait_ms=round(waited * 1000, 3)
+        )
+        metrics.set_gauge("update_queue_depth", (self._admin if lane == "admin" else self._user).qsize(), lane=lane)
+        return packet
+
+def install_update_queue(client: Client) -> UpdateQueue:
+    """Replace `client`'s dispatcher queue with a bounded two-lane UpdateQueue (before start)."""
+    queue = UpdateQueue()
+    client.dispatcher.updates_queue = queue
+    logger.info(f"Update queue installed ({client.workers} workers, {UPDATE_QUEUE_SIZE} pending updates max)")
+    return queue
+
+def start_admin_workers(client: Client, count: int = ADMIN_WORKERS):
+    """Start dispatcher workers that only take updates from the admin lane (after start).
+
+    They are added to the dispatcher's worker tasks, so Dispatcher.stop() stops them too.
+    """
+    dispatcher = client.dispatcher
+    tasks = []
+    token = _admin_lane.set(True)
+    try:
+        for _ in range(count):
+            # Registered with the dispatcher's locks so add_handler() waits for these workers too
+            lock = asyncio.Lock()
+            dispatcher.locks_list.append(lock)
+            tasks.append(asyncio.create_task(dispatcher.handler_worker(lock)))
+    finally:
+        _admin_lane.reset(token)
+    dispatcher.handler_worker_tasks.extend(tasks)
+    dispatcher.updates_queue.add_admin_workers(count)
+    logger.info(f"Started {count} admin update workers")
+    return tasks
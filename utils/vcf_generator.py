@@ -1,56 +1,99 @@
-import logging
-import os
-from datetime import datetime
-from database.connection import get_db
-from database.users import get_user_submissions
-from config import DOWNLOAD_CHANNEL
-
-# Setup logging
-logger = logging.getLogger(__name__)
-
-def generate_vcf(group_id: str) -> str:
-    """Generate a VCF file for the specified group and return the file path."""
-    try:
-        # Fetch watermark from config collection
-        db = get_db()
-        watermark_doc = db.config.find_one({"key": "watermark"})
-        watermark = watermark_doc["value"] if watermark_doc else "Generated by WhatsApp Status Bot"
-
-        # Fetch users in the group
-        users = db.users.find({"group_id": group_id, "name": {"$exists": True}})
-        user_list = list(users)
-        if not user_list:
-            logger.error(f"No users found for group {group_id}")
-            return None
-
-        # Create VCF content
-        vcf_content = ""
-        for user in user_list:
-            name = user["name"].replace(";", "").replace("\n", "")  # Sanitize name
-            number = user["number"].replace(" ", "").replace("-", "")  # Sanitize number
-            vcf_content += (
-                "BEGIN:VCARD\n"
-                "VERSION:3.0\n"
-                f"N:{name};;;\n"
-                f"FN:{name}\n"
-                f"TEL;TYPE=CELL:{number}\n"
-                f"NOTE:{watermark}\n"
-                "END:VCARD\n"
-            )
-
-        # Ensure data/temp_vcf directory exists
-        os.makedirs("data/temp_vcf", exist_ok=True)
-
-        # Generate file path
-        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-        file_path = f"data/temp_vcf/{group_id}_{timestamp}.vcf"
-
-        # Write VCF file
-        with open(file_path, "w", encoding="utf-8") as f:
-            f.write(vcf_content)
-        
-        logger.info(f"Generated VCF file for group {group_id} at {file_path}")
-        return file_path
-    except Exception as e:
-        logger.error(f"Error generating VCF for group {group_id}: {e}")
-        return None
\ No newline at end of file
+import logging
+import io
+import tempfile
+from datetime import datetime
+from database.connection import get_db
+from config import DOWNLOAD_CHANNEL, TEMP_VCF_PATH, VCF_SPOOL_MAX_BYTES
+from utils.spool import vcf_spool
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+def _get_watermark(db) -> str:
+    """Fetch the VCF watermark from the config collection."""
+    watermark_doc = db.config.find_one({"key": "watermark"})
+    return watermark_doc["value"] if watermark_doc else "Generated by WhatsApp Status Bot"
+
+def _render_vcards(user_list, watermark: str):
+    """Yield one vCard entry per submitted user."""
+    for user in user_list:
+        name = user["name"].replace(";", "").replace("\n", "")  # Sanitize name
+        number = user["number"].replace(" ", "").replace("-", "")  # Sanitize number
+        yield (
+            "BEGIN:VCARD\n"
+            "VERSION:3.0\n"
+            f"N:{name};;;\n"
+            f"FN:{name}\n"
+            f"TEL;TYPE=CELL:{number}\n"
+            f"NOTE:{watermark}\n"
+            "END:VCARD\n"
+        )
+
+def generate_vcf_buffer(group_id: str, generation: int):
+    """Generate a VCF for the specified group generation into a binary buffer ready for upload.
+
+    The VCF is kept in memory until it grows past VCF_SPOOL_MAX_BYTES, then it
+    spills to an anonymous temporary file that is removed when the buffer is closed.
+    The caller owns the returned buffer and must close it after uploading.
+    """
+    buffer = None
+    try:
+        db = get_db()
+        watermark = _get_watermark(db)
+
+        # Fetch users in the group
+        users = db.submissions.find({"group_id": group_id, "generation": generation}, {"_id": 0, "name": 1, "number": 1})
+        buffer = io.BytesIO()
+        written = 0
+        for vcard in _render_vcards(users, watermark):
+            buffer.write(vcard.encode("utf-8"))
+            written += 1
+            if isinstance(buffer, io.BytesIO) and buffer.tell() > VCF_SPOOL_MAX_BYTES:
+                spilled = tempfile.TemporaryFile(dir=TEMP_VCF_PATH, suffix=".vcf")
+                spilled.write(buffer.getbuffer())
+                buffer.close()
+                buffer = spilled
+                logger.info(f"VCF for group {group_id} exceeded {VCF_SPOOL_MAX_BYTES} bytes, spilled to temp file")
+
+        if not written:
+            logger.error(f"No users found for group {group_id}")
+            buffer.close()
+            return None
+
+        buffer.seek(0)
+        logger.info(f"Generated in-memory VCF for group {group_id} with {written} contacts")
+        return buffer
+    except Exception as e:
+        if buffer is not None:
+            buffer.close()
+        logger.error(f"Error generating VCF buffer for group {group_id}: {e}")
+        return None
+
+def generate_vcf(group_id: str, generation: int) -> str:
+    """Generate a VCF file for the specified group generation and return the file path."""
+    try:
+        db = get_db()
+        watermark = _get_watermark(db)
+
+        # Fetch users in the group
+        users = db.submissions.find({"group_id": group_id, "generation": generation}, {"_id": 0, "name": 1, "number": 1})
+        user_list = list(users)
+        if not user_list:
+            logger.error(f"No users found for group {group_id}")
+            return None
+
+        # Create VCF content
+        vcf_content = "".join(_render_vcards(user_list, watermark))
+
+        # Write VCF file atomically into the managed spool
+        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
+        file_path = vcf_spool.write(f"{group_id}_{timestamp}.vcf", vcf_content)
+        if not file_path:
+            logger.error(f"Failed to store VCF file for group {group_id} in the spool")
+            return None
+
+        logger.info(f"Generated VCF file for group {group_id} at {file_path}")
+        return file_path
+    except Exception as e:
+        logger.error(f"Error generating VCF for group {group_id}: {e}")
+        return None